@@ -1,6 +1,6 @@
-import warnings
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import Any, Callable, Optional, Union
+from typing import Any, Callable, Optional, Tuple, Union
 
 import fineslice as fine
 import matplotlib.colors
@@ -9,10 +9,54 @@ from matplotlib import colors as pltcol
 from matplotlib import pyplot as plt
 
 from ...datacube.datacube import Datacube
-from ...loader.nifti import get_nifti_cube
+from ...loader.nifti import get_nifti_cube, submit_nifti_cube
+from ...slicer.interpolate import INTERPOLATIONS
+from ...slicer.projection import (
+    apply_voxelwise,
+    project_volume,
+    project_volumes,
+)
+from ...slicer.sample import sample_slice
 from .layer import Layer, Style
 
 
+def _view_extent(
+    view_axis: int, cube: Datacube, bounds: Optional[np.ndarray]
+) -> np.ndarray:
+    """
+    World extent of the in-plane axes of a view.
+    """
+    if bounds is None:
+        bounds = cube.affine_info.world_bounds
+    extent = np.ptp(np.asarray(bounds, dtype=np.float64)[:3], axis=1)
+    return np.delete(extent, view_axis)
+
+
+def _pixel_size(
+    plt_ax: plt.Axes, view_axis: int, cube: Datacube, bounds: Optional[np.ndarray]
+) -> float:
+    """
+    World size of a screen pixel when rendering a view into ``plt_ax``
+    (at the figure DPI).
+    """
+    extent = _view_extent(view_axis, cube, bounds)
+    window = plt_ax.get_window_extent()
+    return float(np.max(extent / np.maximum((window.width, window.height), 1)))
+
+
+def _screen_resolution(
+    plt_ax: plt.Axes, view_axis: int, cube: Datacube, bounds: Optional[np.ndarray]
+) -> Tuple[int, int]:
+    """
+    Slice resolution (``fineslice`` order) matching the screen pixels of a
+    view rendered into ``plt_ax``.
+    """
+    pixel_size = _pixel_size(plt_ax, view_axis, cube, bounds)
+    extent = _view_extent(view_axis, cube, bounds)
+    wn, hn = (np.ceil(extent / max(pixel_size, 1e-12)) + 1).astype(int)
+    return int(hn), int(wn)
+
+
 class LayerVoxel(Layer):
     """
     A layer that renders a 3D voxel image slice (optionally with an alpha mask).
@@ -32,24 +76,109 @@ class LayerVoxel(Layer):
         legend: bool = False,
         legend_label: Optional[str] = None,
         z_index: int = 0,
+        defer_load: bool = False,
+        frame: Optional[int] = None,
+        pyramid: bool = True,
+        alpha_voxelwise: bool = True,
+        labels: bool = False,
     ) -> None:
+        """
+        Args:
+            data: Voxel image (Datacube, nibabel image or file name).
+            alpha_map: Alpha image or function computing it from ``data``.
+            alpha: Layer opacity.
+            color_scale: Color scale.
+            interp_data: Data interpolation (``"nearest"``, ``"linear"`` or
+                         ``"cubic"``). Interpolated slices are sampled at
+                         screen resolution.
+            interp_screen: Screen (matplotlib) interpolation.
+            style: Layer style.
+            legend: Render a legend for this layer.
+            legend_label: Legend label.
+            z_index: Layer order.
+            defer_load: Load files in the background loader thread pool
+                        and only wait for them when rendering.
+            frame: Frame to render if ``data`` is a 4D image.
+            pyramid: Sample from the coarsest pyramid level (see
+                     ``Datacube.pyramid_level()``) that is still finer than
+                     the screen pixels.
+            alpha_voxelwise: Evaluate a callable ``alpha_map`` on the sampled
+                             data instead of the whole volume. Disable for
+                             functions that are not voxel-wise
+                             (e.g. smoothing).
+            labels: ``data`` is a label image (e.g. an atlas): pyramid
+                    levels subsample it instead of averaging.
+        """
         super().__init__(legend=legend, z_index=z_index, style=style)
-        self.data: Datacube = get_nifti_cube(data)
-        self.alpha_map: Optional[
-            Union[Datacube, Callable[[Datacube], Datacube]]
-        ] = get_nifti_cube(alpha_map)
+        load = submit_nifti_cube if defer_load else get_nifti_cube
+        self._data: Union[Datacube, Future] = load(data, frame=frame)
+        self._alpha_map: Optional[
+            Union[Datacube, Callable[[Datacube], Datacube], Future]
+        ] = None if alpha_map is None else load(alpha_map)
         self.alpha: float = 1.0 if alpha is None else alpha
         self.color_scale: ColorScale = (
             ColorScale() if color_scale is None else color_scale
         )
-        self.interp_data = interp_data  # todo
+        if interp_data not in INTERPOLATIONS:
+            raise ValueError(
+                f"Unknown interpolation '{interp_data}' "
+                f"(expected one of {INTERPOLATIONS})"
+            )
+        self.interp_data = interp_data
         self.interp_screen = interp_screen
         self.legend_label = legend_label
+        self.pyramid = pyramid
+        self.alpha_voxelwise = alpha_voxelwise
+        self.labels = labels
+
+    @property
+    def data(self) -> Datacube:
+        if isinstance(self._data, Future):
+            self._data = self._data.result()
+        assert isinstance(self._data, Datacube)
+        return self._data
+
+    @data.setter
+    def data(self, data: Datacube) -> None:
+        self._data = data
+
+    @property
+    def alpha_map(self) -> Optional[Union[Datacube, Callable[[Datacube], Datacube]]]:
+        if isinstance(self._alpha_map, Future):
+            self._alpha_map = self._alpha_map.result()
+        assert not isinstance(self._alpha_map, Future)
+        return self._alpha_map
+
+    @alpha_map.setter
+    def alpha_map(
+        self, alpha_map: Optional[Union[Datacube, Callable[[Datacube], Datacube]]]
+    ) -> None:
+        self._alpha_map = alpha_map
+
+    def _level(
+        self,
+        cube: Datacube,
+        plt_ax: plt.Axes,
+        view_axis: int,
+        bounds: Optional[np.ndarray],
+        labels: bool = False,
+    ) -> Datacube:
+        if not self.pyramid:
+            return cube
+        pixel_size = _pixel_size(plt_ax, view_axis, cube, bounds)
+        return cube.pyramid_level(cube.pyramid_level_for(pixel_size), labels)
+
+    def _alpha_voxelwise(self, raster: np.ndarray) -> np.ndarray:
+        """
+        Evaluate the callable alpha map on sampled data.
+        """
+        assert callable(self.alpha_map)
+        return apply_voxelwise(self.alpha_map, raster, self.data.precision)
 
     def pre_render(self, base_style: Style) -> None:
         super().pre_render(base_style)
         self.color_scale.attach_image(self)
-        if callable(self.alpha_map):
+        if callable(self.alpha_map) and not self.alpha_voxelwise:
             self.alpha_map = self.alpha_map(self.data)
 
     def view_render(
@@ -64,34 +193,69 @@ class LayerVoxel(Layer):
         if d_origin is None:
             return False
 
-        sample = fine.sample_2d(
-            texture=self.data.image,
-            affine=self.data.affine,
-            out_position=d_origin,
-            out_axis=view_axis,
-            out_bounds=bounds,
+        data = self._level(self.data, plt_ax, view_axis, bounds, self.labels)
+        resolution = (
+            None
+            if self.interp_data == "nearest"
+            else _screen_resolution(plt_ax, view_axis, data, bounds)
+        )
+        sample = sample_slice(
+            data,
+            view_axis,
+            d_origin,
+            bounds,
+            out_resolution=resolution,
+            interpolation=self.interp_data,
         )
 
         if sample is None:
-            pass  # todo
+            # image (e.g. a cropped overlay) does not intersect the view
+            return False
 
         sample_alpha = None
-        if self.alpha_map is not None:
-            assert isinstance(self.alpha_map, Datacube)
-            sample_alpha = fine.sample_2d(
-                texture=self.alpha_map.image,  # type: ignore
-                affine=self.alpha_map.affine,
-                out_position=d_origin,
-                out_axis=view_axis,
-                out_bounds=bounds,
-                out_resolution=sample.texture.shape,  # type: ignore
+        if callable(self.alpha_map):
+            sample_alpha = sample._replace(
+                texture=self._alpha_voxelwise(sample.texture)
             )
+        elif self.alpha_map is not None:
+            alpha_map = self._level(self.alpha_map, plt_ax, view_axis, bounds)
+            if alpha_map.on_grid(data.affine, data.shape):
+                sample_alpha = sample_slice(
+                    alpha_map,
+                    view_axis,
+                    d_origin,
+                    bounds,
+                    out_resolution=resolution,
+                    interpolation=self.interp_data,
+                )
+            else:
+                # sample the alpha map on the same pixels as the data
+                plane_bounds = np.ones((4, 2))
+                plane_bounds[view_axis] = d_origin[view_axis]
+                plane_bounds[
+                    [a for a in range(3) if a != view_axis]
+                ] = sample.coordinates
+                sample_alpha = sample_slice(
+                    alpha_map,
+                    view_axis,
+                    d_origin,
+                    plane_bounds,
+                    out_resolution=sample.texture.shape[::-1],  # type: ignore
+                    interpolation=self.interp_data,
+                )
 
             if sample_alpha is None:
-                pass  # todo
-            else:
-                if self.alpha < 1:
-                    sample_alpha.texture *= self.alpha
+                return False
+
+        raster_alpha = None
+        if sample_alpha is not None:
+            # copy: the fast path returns views of the alpha map
+            raster_alpha = sample_alpha.texture.astype(np.float64)
+            if self.interp_data != "nearest":
+                # interpolation (cubic overshoot, float32 rounding) may leave [0, 1]
+                np.clip(raster_alpha, 0, 1, out=raster_alpha)
+            if self.alpha < 1:
+                raster_alpha *= self.alpha
 
         plt_ax.imshow(
             sample.texture.T,
@@ -100,7 +264,7 @@ class LayerVoxel(Layer):
             vmax=self.color_scale.vmax,
             cmap=self.color_scale.cmap,
             origin="lower",
-            alpha=self.alpha if sample_alpha is None else sample_alpha.texture.T,
+            alpha=self.alpha if raster_alpha is None else raster_alpha.T,
             interpolation=self.interp_screen,
             extent=sample.coordinates.flatten(),  # type: ignore
         )
@@ -123,10 +287,13 @@ class ColorScale:
     vmax: Optional[float] = None
 
     def attach_image(self, image: LayerVoxel) -> None:
+        if self.vmin is not None and self.vmax is not None:
+            return
+        stats = image.data.stats
         if self.vmin is None:
-            self.vmin = np.nanmin(image.data.image)
+            self.vmin = stats.min
         if self.vmax is None:
-            self.vmax = np.nanmax(image.data.image)
+            self.vmax = stats.max
 
     def render_legend(
         self,
@@ -197,36 +364,37 @@ class LayerVoxelGlass(LayerVoxel):
         d_points: Optional[fine.types.SamplerPoints] = None,
         d_axis: Optional[int] = None,
     ) -> bool:
-        sample = fine.sample_3d(
-            texture=self.data.image, affine=self.data.affine, out_bounds=bounds
-        )
+        sample_alpha = None
+        if callable(self.alpha_map):
+            # project the data and its alpha map from one resampled volume
+            sample, sample_alpha = project_volumes(
+                self.data,
+                view_axis,
+                [("sum", None), ("max", self.alpha_map)],
+                bounds,
+            )
+        else:
+            sample = project_volume(self.data, view_axis, bounds, "sum")
 
         if sample is None:
-            pass  # todo
-
-        with warnings.catch_warnings():
-            warnings.filterwarnings("ignore", r"All-NaN slice encountered")
-            raster_2d = np.nansum(sample.texture, axis=view_axis)
+            # image (e.g. a cropped overlay) does not intersect the view
+            return False
 
         raster_alpha_2d = None
         if self.alpha_map is not None:
-            assert isinstance(self.alpha_map, Datacube)
-            sample_alpha = fine.sample_3d(
-                texture=self.alpha_map.image,
-                affine=self.alpha_map.affine,
-                out_bounds=bounds,
-            )
+            if not callable(self.alpha_map):
+                sample_alpha = project_volume(self.alpha_map, view_axis, bounds, "max")
 
             if sample_alpha is None:
-                pass  # todo
+                return False
 
-            raster_alpha_2d = np.nanmax(sample_alpha.texture, axis=view_axis)
+            raster_alpha_2d = sample_alpha.texture.astype(np.float64)
 
             if self.alpha < 1:
                 raster_alpha_2d *= self.alpha
 
         plt_ax.imshow(
-            raster_2d.T,
+            sample.texture.T,
             norm=None,
             vmin=self.color_scale.vmin,
             vmax=self.color_scale.vmax,
@@ -234,6 +402,6 @@ class LayerVoxelGlass(LayerVoxel):
             origin="lower",
             alpha=self.alpha if raster_alpha_2d is None else raster_alpha_2d.T,
             interpolation=self.interp_screen,
-            extent=np.delete(sample.coordinates, view_axis, axis=0).flatten(),  # type: ignore
+            extent=sample.coordinates.flatten(),  # type: ignore
         )
         return True
@@ -1,11 +1,16 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 
 import fineslice as fine
 import numpy as np
 from matplotlib import pyplot as plt
 
+from ...slicer.clusters import find_peak
+from ..layer.image_3d import LayerVoxel
 from ..layer.layer import Layer
 
+AUTO_PEAK = "auto-peak"
+"""View origin centered on the peak of the top voxel layer."""
+
 
 class View:  # pylint: disable=too-few-public-methods
     """
@@ -18,23 +23,53 @@ class View:  # pylint: disable=too-few-public-methods
         self,
         view_axis: int = 0,
         bounds: Optional[np.ndarray] = None,
-        origin: Optional[fine.types.SamplerPointLike] = None,
+        origin: Optional[Union[fine.types.SamplerPointLike, str]] = None,
         points: Optional[fine.types.SamplerPointsLike] = None,
         axis: Optional[int] = None,
+        peak_threshold: Optional[float] = None,
     ) -> None:
+        """
+        Args:
+            view_axis: Axis orthogonal to the view.
+            bounds: Bounds of the view.
+            origin: Origin of the view, or ``"auto-peak"`` for the peak of
+                    the largest cluster of the top voxel layer (see
+                    ``find_peak()``).
+            points: Points passed to the layers.
+            axis: Axis passed to the layers.
+            peak_threshold: Cluster forming threshold of ``"auto-peak"``
+                            (without a threshold, or if no voxel exceeds
+                            it, the view is centered on the maximum voxel).
+        """
         self.view_axis = view_axis
         self.bounds = bounds
-        self.origin = None if origin is None else fine.types.sampler_point_3d(origin)
+        self.auto_peak = isinstance(origin, str)
+        if self.auto_peak and origin != AUTO_PEAK:
+            raise ValueError(f"Unknown view origin '{origin}'")
+        self.origin = (
+            None
+            if origin is None or isinstance(origin, str)
+            else fine.types.sampler_point_3d(origin)
+        )
+        self.peak_threshold = peak_threshold
         self.points = None if points is None else fine.types.as_sampler_points(points)
         self.axis = axis
 
+    def _auto_peak(self, layers: List[Layer]) -> Optional[fine.types.SamplerPoint]:
+        voxel_layers = [layer for layer in layers if isinstance(layer, LayerVoxel)]
+        if len(voxel_layers) == 0:
+            return None
+        peak = find_peak(voxel_layers[-1].data, self.peak_threshold)
+        return fine.types.sampler_point_3d(peak)
+
     def render(self, layers: List[Layer], plt_ax: plt.Axes) -> None:
+        origin = self._auto_peak(layers) if self.auto_peak else self.origin
         for layer in layers:
             layer.view_render(
                 plt_ax=plt_ax,
                 view_axis=self.view_axis,
                 bounds=self.bounds,
-                d_origin=self.origin,
+                d_origin=origin,
                 d_points=self.points,
                 d_axis=self.axis,
             )
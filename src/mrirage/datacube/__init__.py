@@ -1,3 +1,12 @@
 from .datacube import Datacube
+from .lru import LRUCache
+from .resample import clear_resample_cache, resample_cache
+from .shared import SharedDatacube
 
-__all__ = ["Datacube"]
+__all__ = [
+    "Datacube",
+    "LRUCache",
+    "clear_resample_cache",
+    "resample_cache",
+    "SharedDatacube",
+]
@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from typing import Iterable, Tuple, Union
+
+import numpy as np
+
+AXIS_ALIGNED_TOLERANCE = 1e-6
+"""Relative size of off-axis affine components still considered zero."""
+
+
+@dataclass(frozen=True)
+class AffineInfo:
+    """
+    Metadata of a voxel to world affine.
+    """
+
+    voxel_size: np.ndarray
+    """Voxel edge lengths in world units."""
+    axis_permutation: Tuple[int, int, int]
+    """World axis closest to each voxel axis."""
+    axis_flip: Tuple[bool, bool, bool]
+    """Voxel axes pointing in negative world direction."""
+    axis_aligned: bool
+    """Every voxel axis is parallel to a different world axis."""
+    world_bounds: np.ndarray
+    """World bounds of the voxel centers (``[[x_min, x_max], ..., [1, 1]]``)."""
+
+
+def affine_info(affine: np.ndarray, shape: Tuple[int, ...]) -> AffineInfo:
+    """
+    Compute the metadata of an affine.
+
+    Args:
+        affine: Voxel to world affine matrix.
+        shape: Image shape.
+    """
+    linear = np.asarray(affine, dtype=np.float64)[:3, :3]
+    voxel_size = np.linalg.norm(linear, axis=0)
+    permutation = tuple(int(a) for a in np.argmax(np.abs(linear), axis=0))
+    flip = tuple(bool(linear[w, v] < 0) for v, w in enumerate(permutation))
+
+    off_axis = linear.copy()
+    off_axis[permutation, range(3)] = 0
+    aligned = len(set(permutation)) == 3 and bool(
+        np.all(np.abs(off_axis) <= AXIS_ALIGNED_TOLERANCE * voxel_size)
+    )
+
+    corners = np.array(np.meshgrid(*[(0, s - 1) for s in shape[:3]])).reshape(3, -1)
+    world = transform_points(affine, corners.T)
+    world_bounds = np.vstack([np.column_stack((world.min(0), world.max(0))), (1, 1)])
+
+    return AffineInfo(
+        voxel_size=voxel_size,
+        axis_permutation=permutation,  # type: ignore
+        axis_flip=flip,  # type: ignore
+        axis_aligned=aligned,
+        world_bounds=world_bounds,
+    )
+
+
+def transform_points(
+    affine: np.ndarray, points: Union[np.ndarray, Iterable]
+) -> np.ndarray:
+    """
+    Apply an affine to a batch of points.
+
+    Args:
+        affine: Affine matrix.
+        points: Points of shape ``(N, 3)`` or homogeneous ``(N, 4)``
+                (or a single point).
+
+    Returns:
+        Transformed points of the same shape.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if points.shape[-1] == 4:
+        return points @ np.asarray(affine, dtype=np.float64).T
+    return points @ affine[:3, :3].T + affine[:3, 3]
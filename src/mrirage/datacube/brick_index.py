@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+from .sparse import support_slices
+from .texture import SLAB_BYTES
+
+INDEX_BLOCK_SIZE = 16
+"""Edge length of the blocks summarized by a ``BrickIndex``."""
+
+
+def _block_reduce(values: np.ndarray, block_size: int) -> Tuple[np.ndarray, ...]:
+    """
+    NaN-ignoring min and max of each block of a (padded) slab.
+    """
+    x, y, z = (s // block_size for s in values.shape)
+    blocks = values.reshape(x, block_size, y, block_size, z, block_size)
+    if values.dtype.kind in "fc":
+        with np.errstate(invalid="ignore"):
+            vmin = np.fmin.reduce(blocks, axis=(1, 3, 5))
+            vmax = np.fmax.reduce(blocks, axis=(1, 3, 5))
+        return vmin, vmax
+    return blocks.min(axis=(1, 3, 5)), blocks.max(axis=(1, 3, 5))
+
+
+@dataclass(frozen=True)
+class BrickIndex:
+    """
+    Minimum and maximum (ignoring NaNs) of each block of an image, for
+    answering threshold queries without scanning the image.
+
+    Blocks that only contain NaNs have a NaN minimum and maximum.
+    """
+
+    min: np.ndarray
+    max: np.ndarray
+    shape: Tuple[int, ...]
+    block_size: int = INDEX_BLOCK_SIZE
+
+    @staticmethod
+    def from_texture(texture: Any, block_size: int = INDEX_BLOCK_SIZE) -> "BrickIndex":
+        """
+        Build the index in one pass over the texture's slabs.
+
+        Args:
+            texture: 3D texture (numpy array or lazy texture).
+            block_size: Block edge length.
+        """
+        shape = tuple(int(s) for s in texture.shape)
+        dtype = np.dtype(texture.dtype)
+        n = tuple(-(-s // block_size) for s in shape)
+        block_min = np.empty(n, dtype=dtype)
+        block_max = np.empty(n, dtype=dtype)
+
+        plane_bytes = max(1, dtype.itemsize * shape[0] * shape[1])
+        rows = max(1, SLAB_BYTES // plane_bytes // block_size)
+        for kz in range(0, n[2], rows):
+            slab = np.asarray(texture[:, :, kz * block_size : (kz + rows) * block_size])
+            pad = [(0, -s % block_size) for s in slab.shape]
+            # edge padding keeps the extremes of partial blocks
+            slab = np.pad(slab, pad, mode="edge") if any(p for _, p in pad) else slab
+            sl = slice(kz, kz + slab.shape[2] // block_size)
+            block_min[:, :, sl], block_max[:, :, sl] = _block_reduce(slab, block_size)
+        return BrickIndex(block_min, block_max, shape, block_size)
+
+    def blocks_above(self, threshold: float) -> np.ndarray:
+        """
+        Blocks containing any voxel above ``threshold``.
+        """
+        with np.errstate(invalid="ignore"):
+            return self.max > threshold
+
+    def voxel_slices(self, blocks: np.ndarray) -> Optional[Tuple[slice, ...]]:
+        """
+        Voxel slices of the bounding box of the selected blocks (or ``None``
+        if no block is selected).
+        """
+        if not blocks.any():
+            return None
+        slices = []
+        for axis, n in enumerate(self.shape):
+            other = tuple(a for a in range(3) if a != axis)
+            (where,) = np.nonzero(blocks.any(axis=other))
+            slices.append(
+                slice(
+                    int(where[0]) * self.block_size,
+                    min(n, (int(where[-1]) + 1) * self.block_size),
+                )
+            )
+        return tuple(slices)
+
+
+def threshold_slices(
+    texture: Any, index: BrickIndex, threshold: float
+) -> Optional[Tuple[slice, ...]]:
+    """
+    Bounding box of the voxels above ``threshold``, only scanning the
+    blocks the index cannot rule out.
+
+    Args:
+        texture: 3D texture the index was built from.
+        index: Brick index of the texture.
+        threshold: Threshold.
+
+    Returns:
+        Index slices of the bounding box or ``None`` if no voxel is above
+        the threshold.
+    """
+    box = index.voxel_slices(index.blocks_above(threshold))
+    if box is None:
+        return None
+    inner = support_slices(np.asarray(texture[box]), threshold)
+    if inner is None:
+        return None
+    return tuple(slice(b.start + i.start, b.start + i.stop) for b, i in zip(box, inner))
@@ -0,0 +1,137 @@
+import json
+import os
+from typing import Any, List, Tuple, Union
+
+import numpy as np
+
+from .texture import LazyTexture
+
+BRICK_SIZE = 32
+"""Default edge length of the bricks in a volume cache."""
+
+_CACHE_VERSION = 1
+_BRICKS_FILE = "bricks.npy"
+_META_FILE = "meta.json"
+
+
+def _expand_key(key: Any, shape: Tuple[int, ...]) -> Tuple[List[np.ndarray], List[int]]:
+    """
+    Convert a basic index into per-axis index arrays and the axes that
+    were indexed by integers (and are dropped from the result).
+    """
+    if not isinstance(key, tuple):
+        key = (key,)
+    key = key + (slice(None),) * (len(shape) - len(key))
+    ranges, dropped = [], []
+    for axis, (k, n) in enumerate(zip(key, shape)):
+        if isinstance(k, slice):
+            ranges.append(np.arange(n)[k])
+        else:
+            ranges.append(np.atleast_1d(np.arange(n)[k]))
+            if np.ndim(k) == 0:
+                dropped.append(axis)
+    return ranges, dropped
+
+
+class BrickTexture(LazyTexture):
+    """
+    Lazy texture stored as a grid of cubic bricks (e.g. a memory-mapped
+    volume cache). Sampling only touches the bricks containing the
+    indexed voxels.
+    """
+
+    def __init__(self, bricks: np.ndarray, shape: Tuple[int, ...]) -> None:
+        """
+        Args:
+            bricks: Array of shape ``(nx, ny, nz, b, b, b)``.
+            shape: Shape of the volume.
+        """
+        super().__init__(shape=shape, dtype=bricks.dtype)
+        self.bricks = bricks
+        self.brick_size = int(bricks.shape[3])
+
+    def _gather(self, i: np.ndarray, j: np.ndarray, k: np.ndarray) -> np.ndarray:
+        b = self.brick_size
+        return self.bricks[i // b, j // b, k // b, i % b, j % b, k % b]
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        if isinstance(key, tuple) and all(isinstance(k, np.ndarray) for k in key):
+            return self._gather(*key)
+        ranges, dropped = _expand_key(key, self.shape)
+        values = self._gather(*np.ix_(*ranges))
+        return values.squeeze(axis=tuple(dropped)) if dropped else values
+
+    def materialize(self) -> np.ndarray:
+        nx, ny, nz, b = self.bricks.shape[:4]
+        padded = self.bricks.transpose(0, 3, 1, 4, 2, 5).reshape(nx * b, ny * b, nz * b)
+        x, y, z = self.shape
+        return np.ascontiguousarray(padded[:x, :y, :z])
+
+
+def save_bricks(
+    path: Union[str, os.PathLike],
+    texture: Any,
+    affine: np.ndarray,
+    brick_size: int = BRICK_SIZE,
+) -> None:
+    """
+    Write a texture to a bricked volume cache directory.
+
+    The texture is read one row of bricks at a time.
+
+    Args:
+        path: Cache directory.
+        texture: 3D texture (numpy array or lazy texture).
+        affine: Affine matrix.
+        brick_size: Brick edge length.
+    """
+    os.makedirs(path, exist_ok=True)
+    shape = tuple(int(s) for s in texture.shape)
+    n = tuple(-(-s // brick_size) for s in shape)
+    bricks = np.lib.format.open_memmap(
+        os.path.join(path, _BRICKS_FILE),
+        mode="w+",
+        dtype=texture.dtype,
+        shape=n + (brick_size,) * 3,
+    )
+    padded = np.zeros(
+        (n[0] * brick_size, n[1] * brick_size, brick_size), dtype=texture.dtype
+    )
+    for kz in range(n[2]):
+        z0 = kz * brick_size
+        z1 = min(z0 + brick_size, shape[2])
+        padded[...] = 0
+        padded[: shape[0], : shape[1], : z1 - z0] = texture[:, :, z0:z1]
+        bricks[:, :, kz] = padded.reshape(
+            n[0], brick_size, n[1], brick_size, brick_size
+        ).transpose(0, 2, 1, 3, 4)
+    bricks.flush()
+    del bricks
+
+    with open(os.path.join(path, _META_FILE), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": _CACHE_VERSION,
+                "shape": shape,
+                "affine": np.asarray(affine).tolist(),
+            },
+            f,
+        )
+
+
+def load_bricks(path: Union[str, os.PathLike]) -> Tuple[BrickTexture, np.ndarray]:
+    """
+    Memory-map a bricked volume cache directory.
+
+    Args:
+        path: Cache directory.
+
+    Returns:
+        Texture and affine matrix.
+    """
+    with open(os.path.join(path, _META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != _CACHE_VERSION:
+        raise ValueError(f"Unsupported volume cache version in '{path}'")
+    bricks = np.load(os.path.join(path, _BRICKS_FILE), mmap_mode="r")
+    return BrickTexture(bricks, tuple(meta["shape"])), np.array(meta["affine"])
@@ -1,8 +1,45 @@
+import functools
+import itertools
+import os
 import warnings
-from typing import Callable, Iterable, Optional, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import numpy as np
-from scipy.ndimage import gaussian_filter
+import numpy.typing as npt
+from nibabel import orientations
+
+from .affine import AffineInfo, affine_info, transform_points
+from .brick_index import BrickIndex, threshold_slices
+from .bricks import BRICK_SIZE, BrickTexture, load_bricks, save_bricks
+from .expression import ExpressionTexture, ThresholdTexture
+from .filters import gaussian_filter_parallel, roi_voxel_slices
+from .mask import PackedMaskTexture
+from .orientation import ReorientedTexture
+from .pyramid import downsample_2x
+from .resample import cached_resample
+from .shared import SharedDatacube, open_shared_array, share_array
+from .sparse import SPARSE_BLOCK_SIZE, BlockSparseTexture, support_slices
+from .stats import (
+    DatacubeStats,
+    compute_histogram,
+    compute_percentiles,
+    compute_stats,
+)
+from .texture import LazyTexture, ProxyTexture
+
+T = TypeVar("T")
+
+_versions = itertools.count()
 
 
 class Datacube:
@@ -10,27 +47,465 @@ class Datacube:
     Utility class for storing 3D voxel images and affine matrices.
 
     Provides pass through functions for numpy operations on the image.
+    Arithmetic and comparison operators are deferred: they return cubes
+    backed by an ``ExpressionTexture`` that is evaluated on sampling or in
+    one fused pass when the image is needed. The other operand may be a
+    scalar or a cube, which is resampled onto this cube's grid (see
+    ``resample_to()``). Comparisons produce boolean masks, which can be
+    combined with ``&``, ``|`` and ``~`` and bit-packed with ``pack()``.
+
+    The image may be backed by a ``LazyTexture``, in which case voxels are
+    only read when sampled. Full-volume operations materialize it.
+
+    Processing methods (``normalize()``, ``apply_gaussian()``) produce
+    ``precision`` float results and accept an ``out`` array to work in
+    place. Deferred expressions built from a cube see in-place changes.
     """
 
+    default_precision: np.dtype = np.dtype(np.float32)
+    """Default float dtype of processing results."""
+
     def __init__(
         self,
-        image: np.ndarray,
+        image: Union[np.ndarray, LazyTexture],
         affine: np.ndarray,
         affine_inv: Optional[np.ndarray] = None,
+        precision: Optional[npt.DTypeLike] = None,
     ) -> None:
         """
         Args:
-            image: 3D voxel image
+            image: 3D voxel image (numpy array or lazy texture)
             affine: affine matrix
             affine_inv: inverse of affine matrix
                         (optional, will be computed if not provided)
+            precision: float dtype of processing results
+                       (defaults to ``Datacube.default_precision``)
         """
         assert image.ndim == 3, "Datacube must be 3D"
-        self.image = image
+        self._image = image
         self.affine = affine
         self.affine_inv = (
             np.linalg.inv(self.affine) if affine_inv is None else affine_inv
         )
+        self.precision = np.dtype(
+            Datacube.default_precision if precision is None else precision
+        )
+        self._derived: Dict[Hashable, Any] = {}
+        self._own_version = next(_versions)
+        self._derived_version: Hashable = self._own_version
+        self._sources: Tuple[Datacube, ...] = ()
+        """Cubes whose images a deferred expression image reads."""
+
+    @property
+    def version(self) -> Hashable:
+        """
+        Version of the image, changed by ``invalidate()``. The version of a
+        deferred expression also changes with the versions of its operands.
+        """
+        if not self._sources:
+            return self._own_version
+        return (self._own_version,) + tuple(c.version for c in self._sources)
+
+    def invalidate(self) -> None:
+        """
+        Drop cached statistics and other data derived from the image.
+
+        Called whenever the image is replaced; call it manually after
+        modifying the image array in place.
+        """
+        self._derived = {}
+        self._own_version = next(_versions)
+        self._derived_version = self.version
+
+    @property
+    def _derived_data(self) -> Dict[Hashable, Any]:
+        """
+        Data derived from the current version of the image.
+        """
+        version = self.version
+        if version != self._derived_version:
+            # an operand of the expression changed
+            self._derived = {}
+            self._derived_version = version
+        return self._derived
+
+    def _cached(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """
+        Data derived from the image, computed once until ``invalidate()``.
+        """
+        derived = self._derived_data
+        if key not in derived:
+            derived[key] = compute()
+        return derived[key]
+
+    @property
+    def image(self) -> np.ndarray:
+        """
+        3D voxel image. Materializes lazy textures on first access.
+        """
+        if isinstance(self._image, LazyTexture):
+            self._image = self._image.materialize()
+        return self._image
+
+    @image.setter
+    def image(self, image: np.ndarray) -> None:
+        self._image = image
+        self._sources = ()
+        self.invalidate()
+
+    @property
+    def texture(self) -> Union[np.ndarray, LazyTexture]:
+        """
+        3D voxel image without materializing it (for sampling).
+        """
+        return self._image
+
+    @property
+    def is_lazy(self) -> bool:
+        return isinstance(self._image, LazyTexture)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(self._image.shape)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._image.dtype
+
+    def shallow_copy(self) -> "Datacube":
+        """
+        New Datacube sharing this cube's image (operations that replace the
+        image of the copy leave this cube unchanged).
+        """
+        cube = Datacube(self._image, self.affine, self.affine_inv, self.precision)
+        cube._derived = self._derived
+        cube._own_version = self._own_version
+        cube._derived_version = self._derived_version
+        cube._sources = self._sources
+        return cube
+
+    def save_cache(
+        self, path: Union[str, os.PathLike], brick_size: int = BRICK_SIZE
+    ) -> None:
+        """
+        Save the cube as an uncompressed volume cache directory of
+        ``brick_size``-sized 3D bricks plus affine metadata.
+
+        Args:
+            path: Cache directory.
+            brick_size: Brick edge length.
+        """
+        save_bricks(path, self._image, self.affine, brick_size=brick_size)
+
+    @staticmethod
+    def load_cache(path: Union[str, os.PathLike]) -> "Datacube":
+        """
+        Memory-map a volume cache written by ``save_cache()``. Sampling
+        only reads the bricks it touches.
+
+        Args:
+            path: Cache directory.
+
+        Returns:
+            Lazy Datacube.
+        """
+        texture, affine = load_bricks(path)
+        return Datacube(texture, affine)
+
+    def crop(
+        self,
+        margin: int = 1,
+        sparse: bool = False,
+        block_size: int = SPARSE_BLOCK_SIZE,
+        fill_value: float = 0.0,
+    ) -> "Datacube":
+        """
+        Crop the image to the bounding box of its voxels that are neither
+        zero nor NaN (e.g. a mask, atlas or thresholded stat map).
+
+        Only the bounding box is read, so deferred expressions like
+        ``(cube > 3.1).crop()`` never materialize the full image.
+
+        Args:
+            margin: Voxels kept around the bounding box. Samplers repeat the
+                    edge voxels outside the image, so keep at least one
+                    empty voxel.
+            sparse: Store the cropped image as a ``BlockSparseTexture``.
+            block_size: Block edge length of the sparse texture.
+            fill_value: Value of the empty blocks of the sparse texture.
+
+        Returns:
+            Cropped Datacube (with adjusted affine).
+        """
+        box = self.voxel_bounds()
+        if box is None:
+            box = (slice(0, 1),) * 3
+        box = tuple(
+            slice(max(0, s.start - margin), min(n, s.stop + margin))
+            for s, n in zip(box, self.shape)
+        )
+        offset = np.eye(4)
+        offset[:3, 3] = [s.start for s in box]
+        image = np.array(self._image[box])
+        texture: Union[np.ndarray, LazyTexture] = (
+            BlockSparseTexture.from_texture(image, block_size, fill_value)
+            if sparse
+            else image
+        )
+        return Datacube(texture, np.dot(self.affine, offset), precision=self.precision)
+
+    def reorient(self) -> "Datacube":
+        """
+        Reorient the image to the closest canonical (RAS+) voxel order by
+        flipping and transposing voxel axes (no resampling).
+
+        Numpy and memory-mapped images are reoriented as views, without
+        copying. Other lazy textures (e.g. gzip-indexed or bricked images)
+        stay lazy behind a ``ReorientedTexture``.
+
+        Returns:
+            Reoriented Datacube (``self`` if already canonical).
+        """
+        ornt = orientations.io_orientation(self.affine)
+        if np.array_equal(ornt, [[0, 1], [1, 1], [2, 1]]):
+            return self
+        affine = np.dot(self.affine, orientations.inv_ornt_aff(ornt, self.shape))
+        texture = self._image
+        if isinstance(texture, ProxyTexture) and isinstance(texture.source, np.ndarray):
+            texture = ProxyTexture(
+                orientations.apply_orientation(texture.source, ornt),
+                slope=texture.slope,
+                inter=texture.inter,
+            )
+        elif isinstance(texture, LazyTexture):
+            texture = ReorientedTexture(texture, ornt)
+        else:
+            texture = orientations.apply_orientation(texture, ornt)
+        return Datacube(texture, affine, precision=self.precision)
+
+    def to_shared(self) -> SharedDatacube:
+        """
+        Share the cube with worker processes without copying the image.
+
+        Memory-mapped images (uncompressed nifti files and volume caches)
+        are shared by reference to their file; other images are copied once
+        into shared memory, which is released when the cube's image changes
+        and the handle is no longer referenced (or on ``handle.close()``,
+        after which the next call shares the image again).
+
+        Returns:
+            Picklable handle for ``Datacube.from_shared()``.
+        """
+
+        def share() -> SharedDatacube:
+            texture = self._image
+            precision = self.precision.str
+            if isinstance(texture, ProxyTexture) and isinstance(
+                texture.source, np.ndarray
+            ):
+                return SharedDatacube(
+                    share_array(texture.source),
+                    self.affine,
+                    precision,
+                    kind="proxy",
+                    slope=texture.slope,
+                    inter=texture.inter,
+                )
+            if isinstance(texture, BrickTexture):
+                return SharedDatacube(
+                    share_array(texture.bricks),
+                    self.affine,
+                    precision,
+                    kind="bricks",
+                    shape=texture.shape,
+                )
+            return SharedDatacube(share_array(self.image), self.affine, precision)
+
+        derived = self._derived_data
+        handle: Optional[SharedDatacube] = derived.get("shared")
+        if handle is None or handle.closed:
+            handle = derived["shared"] = share()
+        return handle
+
+    @staticmethod
+    def from_shared(handle: SharedDatacube) -> "Datacube":
+        """
+        Map a cube shared with ``Datacube.to_shared()`` (read-only).
+
+        Args:
+            handle: Shared cube handle.
+
+        Returns:
+            Datacube backed by the shared memory or file.
+        """
+        array = open_shared_array(handle.array)
+        texture: Union[np.ndarray, LazyTexture] = array
+        if handle.kind == "proxy":
+            texture = ProxyTexture(array, slope=handle.slope, inter=handle.inter)
+        elif handle.kind == "bricks":
+            texture = BrickTexture(array, handle.shape)
+        return Datacube(texture, handle.affine, precision=handle.precision)
+
+    @property
+    def stats(self) -> DatacubeStats:
+        """
+        Min, max and NaN count of the image, computed once in a single pass
+        (lazy textures are scanned slab by slab instead of materializing
+        them, histogramming their values for ``percentile()`` in the same
+        pass).
+        """
+        return self._cached(
+            "stats", lambda: compute_stats(self._image, key_histogram=self.is_lazy)
+        )
+
+    @property
+    def brick_index(self) -> BrickIndex:
+        """
+        Minimum and maximum of each 16³ block of the image (built once in a
+        single pass and cached). Speeds up ``voxel_bounds()``,
+        ``slices_above()`` and sampling of ``cube > threshold`` masks.
+        """
+        return self._cached("brick_index", lambda: BrickIndex.from_texture(self._image))
+
+    def _brick_index(self, version: Hashable, build: bool) -> Optional[BrickIndex]:
+        """
+        Brick index of the image with the given version (if built or
+        ``build``).
+        """
+        if self.version != version:
+            return None
+        if build:
+            return self.brick_index
+        return self._derived_data.get("brick_index")
+
+    def voxel_bounds(
+        self, threshold: Optional[float] = None
+    ) -> Optional[Tuple[slice, ...]]:
+        """
+        Voxel bounding box of the non-zero voxels (or of the voxels above
+        ``threshold``). Threshold queries, including ``(cube > t)
+        .voxel_bounds()``, use the brick index and only scan the blocks
+        that may contain voxels above the threshold.
+
+        Returns:
+            Index slices or ``None`` if there are no such voxels.
+        """
+        texture = self._image
+        if threshold is not None:
+            return threshold_slices(texture, self.brick_index, threshold)
+        if isinstance(texture, ThresholdTexture):
+            index = texture.brick_index(True)
+            if index is not None:
+                return threshold_slices(texture.operands[0], index, texture.threshold)
+        return support_slices(texture)
+
+    def slices_above(self, threshold: float, axis: int) -> np.ndarray:
+        """
+        Indices of the slices along ``axis`` containing any voxel above
+        ``threshold``.
+        """
+        box = self.voxel_bounds(threshold)
+        if box is None:
+            return np.zeros((0,), dtype=int)
+        other = tuple(a for a in range(3) if a != axis)
+        hits = (np.asarray(self._image[box]) > threshold).any(axis=other)
+        return np.nonzero(hits)[0] + box[axis].start
+
+    def value_range(self) -> Tuple[float, float]:
+        """
+        Minimum and maximum of the image (ignoring NaNs).
+        """
+        stats = self.stats
+        return stats.min, stats.max
+
+    def histogram(self, bins: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Histogram of the image over its value range (ignoring NaNs).
+
+        Returns:
+            Counts and bin edges (as ``np.histogram``).
+        """
+
+        def compute() -> Tuple[np.ndarray, np.ndarray]:
+            vmin, vmax = self.value_range()
+            if np.isnan(vmin):
+                vmin, vmax = 0.0, 1.0
+            return compute_histogram(self._image, bins, (vmin, vmax))
+
+        return self._cached(("histogram", bins), compute)
+
+    def percentile(self, q: Union[float, Iterable[float]]) -> np.ndarray:
+        """
+        Percentiles of the image (ignoring NaNs). Lazy textures are not
+        materialized (see ``compute_percentiles()``).
+
+        Args:
+            q: Percentile or sequence of percentiles (0 to 100).
+        """
+        scalar = isinstance(q, (int, float))
+        q_key = (float(q),) if scalar else tuple(float(v) for v in q)  # type: ignore
+        values = self._cached(
+            ("percentile", q_key),
+            lambda: compute_percentiles(self._image, q_key, self.stats),
+        )
+        return values[0] if scalar else values
+
+    @property
+    def affine_info(self) -> AffineInfo:
+        """
+        Voxel sizes, axis permutation and flips, axis alignment and world
+        bounds of the affine (cached until the affine or image changes).
+        """
+        return self._cached(
+            ("affine_info", np.asarray(self.affine).tobytes()),
+            lambda: affine_info(self.affine, self.shape),
+        )
+
+    @property
+    def voxel_size(self) -> np.ndarray:
+        """
+        Voxel edge lengths in world units.
+        """
+        return self.affine_info.voxel_size
+
+    def pyramid_level(self, level: int, labels: bool = False) -> "Datacube":
+        """
+        Image downsampled by ``2 ** level`` (see ``downsample_2x()``).
+
+        Levels are built lazily from the next finer level and cached until
+        the image changes.
+
+        Args:
+            level: Pyramid level (``0`` is this cube).
+            labels: The image contains labels, subsample instead of averaging.
+        """
+        if level <= 0:
+            return self
+
+        def compute() -> "Datacube":
+            finer = self.pyramid_level(level - 1, labels)
+            image, offset = downsample_2x(finer.texture, labels)
+            scale = np.diag([2.0, 2.0, 2.0, 1.0])
+            scale[:3, 3] = offset
+            return Datacube(
+                image, np.dot(finer.affine, scale), precision=self.precision
+            )
+
+        return self._cached(("pyramid", level, labels), compute)
+
+    def pyramid_level_for(self, pixel_size: float) -> int:
+        """
+        Coarsest pyramid level whose voxels are still no larger than
+        ``pixel_size``.
+
+        Args:
+            pixel_size: Output pixel size in world units.
+        """
+        ratio = pixel_size / float(np.max(self.voxel_size))
+        if not np.isfinite(ratio) or ratio < 2:
+            return 0
+        max_level = int(np.ceil(np.log2(max(self.shape))))
+        return min(int(np.floor(np.log2(ratio))), max_level)
 
     def transform(self, p: Union[np.ndarray, Iterable]) -> np.ndarray:
         """
@@ -44,116 +519,315 @@ class Datacube:
         """
         return np.dot(self.affine_inv, p)  # type: ignore
 
+    def transform_points(self, points: Union[np.ndarray, Iterable]) -> np.ndarray:
+        """
+        Local space -> world space for a batch of points.
+
+        Args:
+            points: Voxel coordinates of shape ``(N, 3)`` or ``(N, 4)``.
+
+        Returns:
+            World coordinates of the same shape.
+        """
+        return transform_points(self.affine, points)
+
+    def transform_points_inv(self, points: Union[np.ndarray, Iterable]) -> np.ndarray:
+        """
+        World space -> local space for a batch of points.
+
+        Args:
+            points: World coordinates of shape ``(N, 3)`` or ``(N, 4)``.
+
+        Returns:
+            Voxel coordinates of the same shape.
+        """
+        return transform_points(self.affine_inv, points)
+
     def apply_gaussian(
-        self, sigma: Union[int, float, complex, Iterable], truncate: float = 4.0
+        self,
+        sigma: Union[int, float, complex, Iterable],
+        truncate: float = 4.0,
+        out: Optional[np.ndarray] = None,
+        bounds: Optional[np.ndarray] = None,
+        max_workers: Optional[int] = None,
     ) -> "Datacube":
-        self.image = gaussian_filter(self.image, sigma=sigma, truncate=truncate)
+        """
+        Smooth the image with a multi-threaded separable gaussian filter.
+
+        Args:
+            sigma: Standard deviation of the gaussian kernel (in voxels).
+            truncate: Truncate the kernel at this many standard deviations.
+            out: Output array (may be the writable image itself to smooth in
+                 place). Defaults to a new array of ``precision`` dtype.
+            bounds: Only smooth voxels within these world bounds (the rest
+                    of the image is left unchanged). Only the bounds padded
+                    by the kernel radius are read.
+            max_workers: Number of threads (defaults to CPU count).
+        """
+        image = self.image
+        if out is None:
+            out = np.empty(image.shape, dtype=self.precision)
+        # scipy.ndimage does not support half precision
+        work = np.empty(image.shape, np.float32) if out.dtype == np.float16 else out
+
+        if bounds is None:
+            gaussian_filter_parallel(image, sigma, work, truncate, max_workers)
+        else:
+            sigmas = np.broadcast_to(np.asarray(sigma, dtype=np.float64), (3,))
+            radius = (truncate * sigmas + 0.5).astype(int)
+            roi = roi_voxel_slices(bounds, self.affine_inv, image.shape)
+            padded = roi_voxel_slices(bounds, self.affine_inv, image.shape, radius)
+            block = gaussian_filter_parallel(
+                image[padded],
+                sigma,
+                np.empty([s.stop - s.start for s in padded], dtype=work.dtype),
+                truncate,
+                max_workers,
+            )
+            if work is not image:
+                work[...] = image
+            work[roi] = block[
+                tuple(
+                    slice(r.start - p.start, r.stop - p.start)
+                    for r, p in zip(roi, padded)
+                )
+            ]
+
+        if work is not out:
+            out[...] = work
+        self.image = out
         return self
 
-    def apply(self, fun: Callable[[np.ndarray], np.ndarray]) -> "Datacube":
-        self.image = fun(self.image)
+    def apply(
+        self,
+        fun: Callable[..., np.ndarray],
+        out: Optional[np.ndarray] = None,
+    ) -> "Datacube":
+        """
+        Replace the image with ``fun(image)``.
+
+        Args:
+            fun: Function applied to the image.
+            out: Output array passed to ``fun`` as ``out`` keyword
+                 (e.g. for numpy ufuncs), may be the writable image itself.
+        """
+        self.image = fun(self.image) if out is None else fun(self.image, out=out)
         return self
 
     def normalize(
-        self, min_value: float | int = 0.0, max_value: float | int = 1.0
+        self,
+        min_value: float | int = 0.0,
+        max_value: float | int = 1.0,
+        out: Optional[np.ndarray] = None,
     ) -> "Datacube":
-        amin = np.min(self.image)
-        amax = np.max(self.image)
+        """
+        Scale the image linearly so its range starts at ``min_value``.
+
+        Args:
+            min_value: Output minimum.
+            max_value: Output range scale.
+            out: Output array (may be the writable image itself to normalize
+                 in place). Defaults to a new array of ``precision`` dtype.
+        """
+        image = self.image
+        if image.dtype == np.bool_:
+            image = image.view(np.uint8)
+        amin, amax = (float(v) for v in self.value_range())
         arange = amax - amin
         if arange == 0:
             warnings.warn("Could not normalize datacube (zero range).")
             return self
-        self.image = ((self.image - amin) / arange) * max_value + min_value
+        if out is None:
+            out = np.empty(image.shape, dtype=self.precision)
+        np.subtract(image, amin, out=out, casting="unsafe")
+        np.multiply(out, max_value / arange, out=out, casting="unsafe")
+        np.add(out, min_value, out=out, casting="unsafe")
+        self.image = out
         return self
 
-    def __lt__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube(
-            (self.image.__lt__(other)).astype(self.image.dtype),
-            self.affine,
-            self.affine_inv,
+    def astype(self, dtype: npt.DTypeLike) -> "Datacube":
+        """
+        Deferred cast of the image (e.g. to ``np.float16`` for display-only
+        layers).
+        """
+        return self._expression(np.asarray, dtype=dtype)
+
+    def _expression(
+        self,
+        op: Callable[..., np.ndarray],
+        *operands: object,
+        dtype: Optional[npt.DTypeLike] = None,
+    ) -> "Datacube":
+        """
+        Deferred element-wise operation on this cube (see ``ExpressionTexture``).
+        Cube operands must be on this cube's grid (see ``_operand()``).
+        """
+        cubes = (self,) + tuple(o for o in operands if isinstance(o, Datacube))
+        textures = tuple(o._image if isinstance(o, Datacube) else o for o in operands)
+        return self._deferred(
+            ExpressionTexture(op, (self._image,) + textures, dtype=dtype), cubes
         )
 
-    def __le__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube(
-            (self.image.__le__(other)).astype(self.image.dtype),
-            self.affine,
-            self.affine_inv,
+    def _deferred(
+        self, texture: LazyTexture, sources: Tuple["Datacube", ...]
+    ) -> "Datacube":
+        """
+        Cube of a deferred texture reading the images of ``sources`` (its
+        version and derived data follow in-place changes of their images).
+        """
+        cube = Datacube(texture, self.affine, self.affine_inv, self.precision)
+        cube._sources = sources
+        cube._derived_version = cube.version
+        return cube
+
+    def on_grid(self, affine: np.ndarray, shape: Tuple[int, ...]) -> bool:
+        """
+        Whether the image lies on the voxel grid given by ``affine`` and
+        ``shape``.
+        """
+        return tuple(self.shape) == tuple(shape) and bool(
+            np.allclose(self.affine, affine)
         )
 
-    def __gt__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube(
-            (self.image.__gt__(other)).astype(self.image.dtype),
-            self.affine,
-            self.affine_inv,
+    def resample_to(self, target: "Datacube", order: int = 0) -> "Datacube":
+        """
+        Resample the image onto the voxel grid of another cube. Voxels
+        outside this image are set to 0.
+
+        Resampled images are cached by (image version, affine, target
+        affine, target shape and order), so repeated expressions on the same grid
+        resample only once.
+
+        Args:
+            target: Cube defining the voxel grid.
+            order: Spline interpolation order (``0`` is nearest neighbour).
+
+        Returns:
+            Resampled Datacube (or this cube if it already is on the grid).
+        """
+        if self.on_grid(target.affine, target.shape):
+            return self
+        image = cached_resample(
+            (
+                self.version,
+                self.affine.tobytes(),
+                target.affine.tobytes(),
+                tuple(target.shape),
+                order,
+            ),
+            self.image,
+            np.dot(self.affine_inv, target.affine),
+            tuple(target.shape),
+            order,
         )
+        return Datacube(image, target.affine, target.affine_inv, self.precision)
+
+    def _operand(self, other: object) -> Union[float, int, "Datacube"]:
+        """
+        Scalar or cube on this cube's grid for an operator.
+        """
+        if isinstance(other, (float, int)):
+            return other
+        if isinstance(other, Datacube):
+            return other.resample_to(self)
+        raise TypeError()
+
+    def __lt__(self, other: object) -> "Datacube":
+        return self._expression(np.less, self._operand(other))
+
+    def __le__(self, other: object) -> "Datacube":
+        return self._expression(np.less_equal, self._operand(other))
+
+    def __gt__(self, other: object) -> "Datacube":
+        if isinstance(other, (float, int)):
+            return self._deferred(
+                ThresholdTexture(
+                    self._image,
+                    other,
+                    functools.partial(self._brick_index, self.version),
+                ),
+                (self,),
+            )
+        return self._expression(np.greater, self._operand(other))
 
     def __ge__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube(
-            (self.image.__ge__(other)).astype(self.image.dtype),
-            self.affine,
-            self.affine_inv,
-        )
+        return self._expression(np.greater_equal, self._operand(other))
 
     def __eq__(self, other: object) -> "Datacube":  # type: ignore
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube(
-            (self.image.__eq__(other)).astype(self.image.dtype),
-            self.affine,
-            self.affine_inv,
-        )
+        return self._expression(np.equal, self._operand(other))
 
     def __ne__(self, other: object) -> "Datacube":  # type: ignore
-        if not isinstance(other, (float, int)):
-            raise TypeError()
+        return self._expression(np.not_equal, self._operand(other))
+
+    def pack(self) -> "Datacube":
+        """
+        Bit-packed mask of the non-zero voxels (one bit per voxel, see
+        ``PackedMaskTexture``). Deferred comparisons are evaluated slab by
+        slab, so the unpacked mask is never materialized.
+        """
         return Datacube(
-            (self.image.__ne__(other)).astype(self.image.dtype),
+            PackedMaskTexture.from_texture(self._image),
             self.affine,
             self.affine_inv,
+            self.precision,
         )
 
+    def _logical(
+        self,
+        op: Callable[..., np.ndarray],
+        packed_op: Callable[..., np.ndarray],
+        other: object,
+    ) -> "Datacube":
+        operand = self._operand(other)
+        if (
+            isinstance(self._image, PackedMaskTexture)
+            and isinstance(operand, Datacube)
+            and isinstance(operand.texture, PackedMaskTexture)
+        ):
+            return Datacube(
+                self._image.combine(packed_op, operand.texture),
+                self.affine,
+                self.affine_inv,
+                self.precision,
+            )
+        return self._expression(op, operand)
+
+    def __and__(self, other: object) -> "Datacube":
+        return self._logical(np.logical_and, np.bitwise_and, other)
+
+    def __or__(self, other: object) -> "Datacube":
+        return self._logical(np.logical_or, np.bitwise_or, other)
+
+    def __invert__(self) -> "Datacube":
+        if isinstance(self._image, PackedMaskTexture):
+            return Datacube(
+                self._image.combine(np.invert),
+                self.affine,
+                self.affine_inv,
+                self.precision,
+            )
+        return self._expression(np.logical_not)
+
     def __abs__(self) -> "Datacube":
-        return Datacube(abs(self.image), self.affine, self.affine_inv)
+        return self._expression(np.abs)
 
     def __add__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube((self.image.__add__(other)), self.affine, self.affine_inv)
+        return self._expression(np.add, self._operand(other))
 
     def __sub__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube((self.image.__sub__(other)), self.affine, self.affine_inv)
+        return self._expression(np.subtract, self._operand(other))
 
     def __mul__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube((self.image.__mul__(other)), self.affine, self.affine_inv)
+        return self._expression(np.multiply, self._operand(other))
 
     def __pow__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube((self.image.__pow__(other)), self.affine, self.affine_inv)
+        return self._expression(np.power, self._operand(other))
 
     def __truediv__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube((self.image.__truediv__(other)), self.affine, self.affine_inv)
+        return self._expression(np.true_divide, self._operand(other))
 
     def __floordiv__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube((self.image.__floordiv__(other)), self.affine, self.affine_inv)
+        return self._expression(np.floor_divide, self._operand(other))
 
     def __mod__(self, other: object) -> "Datacube":
-        if not isinstance(other, (float, int)):
-            raise TypeError()
-        return Datacube((self.image.__mod__(other)), self.affine, self.affine_inv)
+        return self._expression(np.mod, self._operand(other))
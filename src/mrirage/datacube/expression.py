@@ -0,0 +1,95 @@
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from .brick_index import BrickIndex
+from .texture import LazyTexture, _is_index_arrays
+
+
+def _is_texture(operand: Any) -> bool:
+    return isinstance(operand, (np.ndarray, LazyTexture))
+
+
+class ExpressionTexture(LazyTexture):
+    """
+    Deferred element-wise operation on textures and scalars.
+
+    Nested expressions are evaluated together: sampling only evaluates the
+    indexed voxels, and ``materialize()`` evaluates the whole expression
+    slab by slab into a single output array, so full-size temporaries are
+    never allocated.
+    """
+
+    def __init__(
+        self,
+        op: Callable[..., np.ndarray],
+        operands: Tuple[Any, ...],
+        dtype: Optional[npt.DTypeLike] = None,
+    ) -> None:
+        """
+        Args:
+            op: Element-wise function (e.g. a numpy ufunc).
+            operands: Textures (of equal shape) and scalars.
+            dtype: Output dtype (defaults to the result dtype of ``op``).
+        """
+        textures = [o for o in operands if _is_texture(o)]
+        assert len(textures) > 0, "Expression needs at least one texture operand"
+        self.op = op
+        self.operands = operands
+        self.cast = dtype is not None
+        if dtype is None:
+            dtype = op(
+                *(np.zeros((0,), o.dtype) if _is_texture(o) else o for o in operands)
+            ).dtype
+        super().__init__(shape=textures[0].shape, dtype=dtype)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        values = self.op(*(o[key] if _is_texture(o) else o for o in self.operands))
+        return values.astype(self.dtype, copy=False) if self.cast else values
+
+    def materialize(self) -> np.ndarray:
+        out = np.empty(self.shape, dtype=self.dtype)
+        for sl, slab in self.iter_slabs():
+            out[:, :, sl] = slab
+        return out
+
+
+class ThresholdTexture(ExpressionTexture):
+    """
+    Deferred ``texture > threshold`` that uses a brick index of the texture
+    (if available) to skip sampling blocks below the threshold.
+    """
+
+    def __init__(
+        self,
+        texture: Any,
+        threshold: float,
+        brick_index: Callable[[bool], Optional[BrickIndex]],
+    ) -> None:
+        """
+        Args:
+            texture: Thresholded texture.
+            threshold: Threshold.
+            brick_index: Returns the brick index of ``texture`` (building it
+                         if the argument is ``True``) or ``None``.
+        """
+        super().__init__(np.greater, (texture, threshold))
+        self.threshold = threshold
+        self.brick_index = brick_index
+        self._blocks: Optional[np.ndarray] = None
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        index = self.brick_index(False)
+        if index is None or not _is_index_arrays(key):
+            return super().__getitem__(key)
+        if self._blocks is None:
+            self._blocks = index.blocks_above(self.threshold)
+        i, j, k = np.broadcast_arrays(*key)
+        b = index.block_size
+        hit = self._blocks[i // b, j // b, k // b]
+        values = np.zeros(hit.shape, dtype=bool)
+        if hit.any():
+            texture = self.operands[0]
+            values[hit] = texture[i[hit], j[hit], k[hit]] > self.threshold
+        return values
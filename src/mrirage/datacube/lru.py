@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class LRUCache(Generic[V]):
+    """
+    Thread-safe LRU cache with a memory budget (``None`` values are cached
+    as well).
+
+    Subclasses define how entries are measured (``_nbytes()``) and prepared
+    for sharing between lookups (``_prepare()``).
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Args:
+            max_bytes: Budget for the memory held by all cached entries.
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, V]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+            )
+
+    def _nbytes(self, value: V) -> int:
+        return int(getattr(value, "nbytes", 0))
+
+    def _prepare(self, value: V) -> V:
+        return value
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], V]) -> V:
+        """
+        Get an entry or compute and cache it.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._stats.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._stats.misses += 1
+        return self.put(key, compute())
+
+    def put(self, key: Hashable, value: V) -> V:
+        """
+        Add an entry to the cache.
+
+        Returns:
+            The cached entry (an earlier entry if ``key`` was already cached).
+        """
+        value = self._prepare(value)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            self._entries[key] = value
+            self._bytes += self._nbytes(value)
+            while len(self._entries) > 1 and self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._nbytes(evicted)
+                self._stats.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._stats = CacheStats()
@@ -0,0 +1,71 @@
+from typing import Any, Callable, Tuple
+
+import numpy as np
+
+from .bricks import _expand_key
+from .texture import SLAB_BYTES, LazyTexture
+
+
+class PackedMaskTexture(LazyTexture):
+    """
+    Boolean texture packed to one bit per voxel (along the last axis).
+
+    Sampling unpacks only the indexed voxels. Masks are combined
+    (``&``, ``|``, ``~``) on the packed bytes.
+    """
+
+    def __init__(self, packed: np.ndarray, shape: Tuple[int, ...]) -> None:
+        """
+        Args:
+            packed: Packed bits (``np.packbits(mask, axis=2)``).
+            shape: Shape of the mask.
+        """
+        super().__init__(shape=shape, dtype=np.bool_)
+        self.packed = packed
+
+    @staticmethod
+    def from_texture(texture: Any) -> "PackedMaskTexture":
+        """
+        Pack the non-zero voxels of a texture, reading it in slabs.
+
+        Args:
+            texture: 3D texture (numpy array or lazy texture).
+        """
+        shape = tuple(int(s) for s in texture.shape)
+        packed = np.empty((shape[0], shape[1], -(-shape[2] // 8)), dtype=np.uint8)
+        plane_bytes = max(1, np.dtype(texture.dtype).itemsize * shape[0] * shape[1])
+        slab_size = max(8, SLAB_BYTES // plane_bytes // 8 * 8)
+        for start in range(0, shape[2], slab_size):
+            slab = np.asarray(texture[:, :, start : start + slab_size], dtype=bool)
+            packed[
+                :, :, start // 8 : start // 8 + -(-slab.shape[2] // 8)
+            ] = np.packbits(slab, axis=2)
+        return PackedMaskTexture(packed, shape)
+
+    def combine(
+        self, op: Callable[..., np.ndarray], *others: "PackedMaskTexture"
+    ) -> "PackedMaskTexture":
+        """
+        Apply a bitwise operation to the packed bytes of masks of equal shape.
+        """
+        return PackedMaskTexture(
+            op(self.packed, *(o.packed for o in others)), self.shape
+        )
+
+    @property
+    def resident_nbytes(self) -> int:
+        return int(self.packed.nbytes)
+
+    def _gather(self, i: np.ndarray, j: np.ndarray, k: np.ndarray) -> np.ndarray:
+        bits = self.packed[i, j, k // 8] >> (7 - k % 8).astype(np.uint8)
+        return (bits & 1).astype(bool)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        if isinstance(key, tuple) and all(isinstance(k, np.ndarray) for k in key):
+            return self._gather(*key)
+        ranges, dropped = _expand_key(key, self.shape)
+        values = self._gather(*np.ix_(*ranges))
+        return values.squeeze(axis=tuple(dropped)) if dropped else values
+
+    def materialize(self) -> np.ndarray:
+        return np.unpackbits(self.packed, axis=2, count=self.shape[2]).view(bool)
@@ -0,0 +1,93 @@
+from typing import Any, List, Tuple
+
+import numpy as np
+from nibabel import orientations
+
+from .bricks import _expand_key
+from .texture import LazyTexture, _is_index_arrays
+
+
+def _range_slice(r: range) -> slice:
+    if len(r) == 0:
+        return slice(0, 0)
+    stop = r[-1] + (1 if r.step > 0 else -1)
+    return slice(r[0], None if stop < 0 else stop, r.step)
+
+
+class ReorientedTexture(LazyTexture):
+    """
+    Lazy view of a texture with flipped and transposed voxel axes
+    (see ``nibabel.orientations.apply_orientation()``).
+
+    Indexing is translated to the source texture, so only the indexed
+    voxels are read.
+    """
+
+    def __init__(self, texture: Any, ornt: np.ndarray) -> None:
+        """
+        Args:
+            texture: 3D texture (numpy array or lazy texture).
+            ornt: Orientation (``nibabel.orientations`` convention): output
+                  axis and flip (``-1``) of each source axis.
+        """
+        self.texture = texture
+        self.ornt = np.asarray(ornt, dtype=int)
+        self._source_shape = tuple(int(s) for s in texture.shape)
+        shape = [0] * 3
+        self._source_axes = [0] * 3
+        for axis, (out_axis, _) in enumerate(self.ornt):
+            shape[out_axis] = self._source_shape[axis]
+            self._source_axes[out_axis] = axis
+        super().__init__(shape=tuple(shape), dtype=texture.dtype)
+
+    @property
+    def resident_nbytes(self) -> int:
+        if isinstance(self.texture, LazyTexture):
+            return self.texture.resident_nbytes
+        return 0
+
+    def _flipped(self, axis: int) -> bool:
+        return bool(self.ornt[axis, 1] < 0)
+
+    def _gather(self, *index: np.ndarray) -> np.ndarray:
+        source: List[Any] = [None] * 3
+        for out_axis, axis in enumerate(self._source_axes):
+            i = index[out_axis]
+            n = self._source_shape[axis]
+            source[axis] = n - 1 - i if self._flipped(axis) else i
+        return np.asarray(self.texture[tuple(source)])
+
+    def _read(self, key: Tuple[Any, ...]) -> np.ndarray:
+        source: List[Any] = [None] * 3
+        for out_axis, axis in enumerate(self._source_axes):
+            k = key[out_axis]
+            n = self._source_shape[axis]
+            if isinstance(k, slice):
+                r = range(n)[k]
+                if self._flipped(axis):
+                    r = range(n - 1 - r.start, n - 1 - r.stop, -r.step)
+                source[axis] = _range_slice(r)
+            else:
+                k = range(n)[k]
+                source[axis] = n - 1 - k if self._flipped(axis) else k
+        values = np.asarray(self.texture[tuple(source)])
+        kept = [a for a in range(3) if isinstance(source[a], slice)]
+        order = np.argsort([self.ornt[a, 0] for a in kept])
+        return values.transpose(order)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        if _is_index_arrays(key):
+            return self._gather(*key)
+        basic = key if isinstance(key, tuple) else (key,)
+        if len(basic) <= 3 and all(
+            isinstance(k, (slice, int, np.integer)) for k in basic
+        ):
+            return self._read(basic + (slice(None),) * (3 - len(basic)))
+        ranges, dropped = _expand_key(key, self.shape)
+        values = self._gather(*np.ix_(*ranges))
+        return values.squeeze(axis=tuple(dropped)) if dropped else values
+
+    def materialize(self) -> np.ndarray:
+        texture = self.texture
+        image = texture.materialize() if isinstance(texture, LazyTexture) else texture
+        return np.ascontiguousarray(orientations.apply_orientation(image, self.ornt))
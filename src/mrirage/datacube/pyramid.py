@@ -0,0 +1,51 @@
+from typing import Any, Tuple
+
+import numpy as np
+
+from .texture import SLAB_BYTES
+
+
+def _pad_even(block: np.ndarray) -> np.ndarray:
+    pad = [(0, s % 2) for s in block.shape]
+    return np.pad(block, pad, mode="edge") if any(p for _, p in pad) else block
+
+
+def downsample_2x(texture: Any, labels: bool = False) -> Tuple[np.ndarray, float]:
+    """
+    Downsample a texture by a factor of 2 along each axis.
+
+    Images are averaged over 2x2x2 blocks (integer images in floating point,
+    rounded back to their dtype). Boolean images and label images keep every
+    second voxel, so no new values are introduced. The texture is read in
+    slabs along the last axis.
+
+    Args:
+        texture: 3D texture (numpy array or lazy texture).
+        labels: The image contains labels (e.g. an atlas), subsample it.
+
+    Returns:
+        Downsampled image and the voxel offset of its first voxel center in
+        the input (``0.5`` for averaged blocks, ``0.0`` for subsampling).
+    """
+    shape = tuple(int(s) for s in texture.shape)
+    dtype = np.dtype(texture.dtype)
+    average = not labels and dtype.kind != "b"
+    out = np.empty(tuple(-(-s // 2) for s in shape), dtype=dtype)
+
+    plane_bytes = max(1, dtype.itemsize * shape[0] * shape[1])
+    slab_size = max(2, SLAB_BYTES // plane_bytes // 2 * 2)
+    for start in range(0, shape[2], slab_size):
+        slab = np.asarray(texture[:, :, start : start + slab_size])
+        sl = slice(start // 2, start // 2 + -(-slab.shape[2] // 2))
+        if average:
+            slab = _pad_even(slab)
+            x, y, z = (s // 2 for s in slab.shape)
+            mean = slab.reshape(x, 2, y, 2, z, 2).mean(
+                axis=(1, 3, 5), dtype=np.result_type(dtype, np.float32)
+            )
+            if dtype.kind in "iu":
+                mean = np.rint(mean)
+            out[:, :, sl] = mean
+        else:
+            out[:, :, sl] = slab[::2, ::2, ::2]
+    return out, 0.5 if average else 0.0
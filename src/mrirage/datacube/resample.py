@@ -0,0 +1,77 @@
+from typing import Hashable, Tuple
+
+import numpy as np
+from scipy.ndimage import affine_transform
+
+from .lru import LRUCache
+
+RESAMPLE_CACHE_BYTES = 512 * 1024**2
+"""Memory budget of the resampled grid cache."""
+
+resample_cache: LRUCache[np.ndarray] = LRUCache(RESAMPLE_CACHE_BYTES)
+"""Process-wide cache used by ``cached_resample()``."""
+
+
+def resample_image(
+    image: np.ndarray,
+    voxel_to_source: np.ndarray,
+    shape: Tuple[int, ...],
+    order: int = 0,
+) -> np.ndarray:
+    """
+    Resample an image onto another voxel grid. Voxels outside the image
+    are set to 0.
+
+    Args:
+        image: Source image.
+        voxel_to_source: Affine from target voxel to source voxel coordinates.
+        shape: Target shape.
+        order: Spline interpolation order (``0`` is nearest neighbour).
+
+    Returns:
+        Resampled image (in the source dtype, bool and float16 images
+        included).
+    """
+    dtype = image.dtype
+    work = image
+    if dtype == np.bool_:
+        work = image.view(np.uint8)
+    elif dtype == np.float16:
+        work = image.astype(np.float32)
+    resampled = affine_transform(
+        work, voxel_to_source, output_shape=shape, order=order, mode="constant"
+    )
+    return resampled.astype(dtype, copy=False)
+
+
+def cached_resample(
+    key: Hashable,
+    image: np.ndarray,
+    voxel_to_source: np.ndarray,
+    shape: Tuple[int, ...],
+    order: int = 0,
+) -> np.ndarray:
+    """
+    ``resample_image()`` through ``resample_cache``.
+
+    Args:
+        key: Cache key identifying the source image and target grid.
+        image: Source image.
+        voxel_to_source: Affine from target voxel to source voxel coordinates.
+        shape: Target shape.
+        order: Spline interpolation order.
+
+    Returns:
+        Resampled image (read-only, shared between lookups).
+    """
+
+    def resample() -> np.ndarray:
+        resampled = resample_image(image, voxel_to_source, shape, order)
+        resampled.flags.writeable = False
+        return resampled
+
+    return resample_cache.get_or_compute(key, resample)
+
+
+def clear_resample_cache() -> None:
+    resample_cache.clear()
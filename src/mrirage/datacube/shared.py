@@ -0,0 +1,215 @@
+import os
+import threading
+import weakref
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Literal, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class SharedArray:
+    """
+    Picklable reference to an array in shared memory or in a file.
+    """
+
+    shape: Tuple[int, ...]
+    dtype: str
+    order: str = "C"
+    shm_name: Optional[str] = None
+    file_name: Optional[str] = None
+    offset: int = 0
+    _finalizer: Optional[weakref.finalize] = field(
+        default=None, repr=False, compare=False
+    )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the shared memory block is only owned by the creating process
+        state = dict(self.__dict__)
+        state["_finalizer"] = None
+        return state
+
+    @property
+    def closed(self) -> bool:
+        """
+        Whether the shared memory block was released by ``close()``.
+        """
+        return self._finalizer is not None and not self._finalizer.alive
+
+    def close(self) -> None:
+        """
+        Release a shared memory block created by ``share_array()``
+        (called automatically when the owning reference is collected).
+        """
+        if self._finalizer is not None:
+            self._finalizer()
+
+
+def _release(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+    except BufferError:
+        pass  # still mapped by arrays of this process, freed with them
+    if os.name == "posix":
+        # workers sharing this process's resource tracker unregister the
+        # block when attaching; register it again so unlink() can unregister
+        resource_tracker.register("/" + shm.name, "shared_memory")
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+_owned: "weakref.WeakValueDictionary[str, shared_memory.SharedMemory]" = (
+    weakref.WeakValueDictionary()
+)
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, int]] = {}
+"""Shared memory blocks attached by this process and their array count."""
+_attached_lock = threading.Lock()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach a shared memory block without registering it with the resource
+    tracker (which would unlink it when this process exits).
+    """
+    with _attached_lock:
+        shm, count = _attached.get(name, (None, 0))
+        if shm is None:
+            shm = shared_memory.SharedMemory(name=name, create=False)
+            if os.name == "posix":
+                resource_tracker.unregister("/" + shm.name, "shared_memory")
+        _attached[name] = (shm, count + 1)
+        return shm
+
+
+def _detach(name: str) -> None:
+    """
+    Release one array of an attached block, closing the block with the last.
+    """
+    with _attached_lock:
+        shm, count = _attached[name]
+        if count > 1:
+            _attached[name] = (shm, count - 1)
+            return
+        del _attached[name]
+    try:
+        shm.close()
+    except BufferError:
+        pass  # still exported, unmapped when collected
+
+
+def _memmap_location(array: np.ndarray) -> Optional[Tuple[str, int]]:
+    """
+    File name and offset of a contiguous memory-mapped array (or view).
+    """
+    if not isinstance(array, np.memmap) or array.filename is None:
+        return None
+    if not (array.flags.c_contiguous or array.flags.f_contiguous):
+        return None
+    root: Any = array
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    return array.filename, int(root.offset + array.ctypes.data - root.ctypes.data)
+
+
+def share_array(array: np.ndarray) -> SharedArray:
+    """
+    Share an array with other processes. Memory-mapped arrays are shared
+    by reference to their file, other arrays are copied into shared memory
+    once.
+
+    Args:
+        array: Array to share.
+
+    Returns:
+        Picklable reference (see ``open_shared_array()``).
+    """
+    order: Literal["C", "F"] = (
+        "F" if array.flags.f_contiguous and not array.flags.c_contiguous else "C"
+    )
+    location = _memmap_location(array)
+    if location is not None:
+        return SharedArray(
+            shape=array.shape,
+            dtype=array.dtype.str,
+            order=order,
+            file_name=location[0],
+            offset=location[1],
+        )
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf, order=order)[...] = array
+    shared = SharedArray(
+        shape=array.shape,
+        dtype=array.dtype.str,
+        order=order,
+        shm_name=shm.name,
+    )
+    _owned[shm.name] = shm
+    shared._finalizer = weakref.finalize(shared, _release, shm)
+    return shared
+
+
+def open_shared_array(shared: SharedArray) -> np.ndarray:
+    """
+    Map a shared array (read-only, without copying).
+
+    Shared memory blocks stay attached until all arrays mapping them
+    (and their views) are collected.
+    """
+    if shared.file_name is not None:
+        return np.memmap(
+            shared.file_name,
+            dtype=np.dtype(shared.dtype),
+            mode="r",
+            offset=shared.offset,
+            shape=shared.shape,
+            order=shared.order,  # type: ignore
+        )
+
+    assert shared.shm_name is not None
+    owned = _owned.get(shared.shm_name)
+    shm = owned if owned is not None else _attach(shared.shm_name)
+    array = np.ndarray(
+        shared.shape,
+        np.dtype(shared.dtype),
+        buffer=shm.buf,
+        order=shared.order,  # type: ignore
+    )
+    array.flags.writeable = False
+    if owned is None:
+        weakref.finalize(array, _detach, shared.shm_name)
+    return array
+
+
+@dataclass
+class SharedDatacube:
+    """
+    Picklable handle of a Datacube shared with other processes
+    (see ``Datacube.to_shared()``).
+    """
+
+    array: SharedArray
+    affine: np.ndarray
+    precision: str
+    kind: str = "array"
+    """Texture kind: ``"array"``, ``"proxy"`` or ``"bricks"``."""
+    slope: float = 1.0
+    inter: float = 0.0
+    shape: Tuple[int, ...] = ()
+    """Volume shape (of bricked textures)."""
+
+    @property
+    def closed(self) -> bool:
+        """
+        Whether the shared memory block was released by ``close()``.
+        """
+        return self.array.closed
+
+    def close(self) -> None:
+        """
+        Release the shared memory block (in the creating process).
+        """
+        self.array.close()
@@ -0,0 +1,151 @@
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from .bricks import _expand_key
+from .texture import LazyTexture, iter_slabs
+
+SPARSE_BLOCK_SIZE = 16
+"""Default edge length of the blocks of a ``BlockSparseTexture``."""
+
+
+def _support(values: np.ndarray) -> np.ndarray:
+    """
+    Voxels that are neither zero nor NaN.
+    """
+    support = values != 0
+    if values.dtype.kind in "fc":
+        support &= ~np.isnan(values)
+    return support
+
+
+def support_slices(
+    texture: Any, threshold: Optional[float] = None
+) -> Optional[Tuple[slice, ...]]:
+    """
+    Bounding box of the voxels that are neither zero nor NaN (or above a
+    threshold).
+
+    The bounding box is found from per-axis projections of the texture,
+    scanned slab by slab (lazy textures and deferred expressions are never
+    materialized).
+
+    Args:
+        texture: 3D texture (numpy array or lazy texture).
+        threshold: Only include voxels above this value.
+
+    Returns:
+        Index slices of the bounding box or ``None`` if the texture is empty.
+    """
+    hits: List[np.ndarray] = [np.zeros(n, dtype=bool) for n in texture.shape]
+    for sl, slab in iter_slabs(texture):
+        slab = np.asarray(slab)
+        support = _support(slab) if threshold is None else slab > threshold
+        hits[0] |= support.any(axis=(1, 2))
+        hits[1] |= support.any(axis=(0, 2))
+        hits[2][sl] |= support.any(axis=(0, 1))
+    if not hits[0].any():
+        return None
+    slices = []
+    for hit in hits:
+        (where,) = np.nonzero(hit)
+        slices.append(slice(int(where[0]), int(where[-1]) + 1))
+    return tuple(slices)
+
+
+class BlockSparseTexture(LazyTexture):
+    """
+    Texture stored as cubic blocks where blocks only containing
+    ``fill_value`` are not stored. Sampling only gathers from stored blocks.
+    """
+
+    def __init__(
+        self,
+        blocks: np.ndarray,
+        index: np.ndarray,
+        shape: Tuple[int, ...],
+        fill_value: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            blocks: Stored blocks (array of shape ``(n, b, b, b)``).
+            index: Block grid with the position of each block in ``blocks``
+                   (``-1`` for empty blocks).
+            shape: Shape of the volume.
+            fill_value: Value of the voxels in empty blocks.
+        """
+        super().__init__(shape=shape, dtype=blocks.dtype)
+        self.blocks = blocks
+        self.index = index
+        self.block_size = int(blocks.shape[1])
+        self.fill_value = fill_value
+
+    @staticmethod
+    def from_texture(
+        texture: Any, block_size: int = SPARSE_BLOCK_SIZE, fill_value: float = 0.0
+    ) -> "BlockSparseTexture":
+        """
+        Convert a texture, reading it one row of blocks at a time.
+
+        Args:
+            texture: 3D texture (numpy array or lazy texture).
+            block_size: Block edge length.
+            fill_value: Value of the voxels in empty blocks.
+        """
+        shape = tuple(int(s) for s in texture.shape)
+        n = tuple(-(-s // block_size) for s in shape)
+        index = np.full(n, -1, dtype=np.int32)
+        blocks: List[np.ndarray] = []
+        padded = np.empty(
+            (n[0] * block_size, n[1] * block_size, block_size), dtype=texture.dtype
+        )
+        for kz in range(n[2]):
+            z0 = kz * block_size
+            z1 = min(z0 + block_size, shape[2])
+            padded[...] = fill_value
+            padded[: shape[0], : shape[1], : z1 - z0] = texture[:, :, z0:z1]
+            row = padded.reshape(n[0], block_size, n[1], block_size, block_size)
+            row = row.transpose(0, 2, 1, 3, 4)
+            full = row != fill_value
+            if np.isnan(fill_value):
+                full = ~np.isnan(row)
+            occupied = np.nonzero(full.any(axis=(2, 3, 4)))
+            index[occupied + (kz,)] = np.arange(len(occupied[0])) + sum(
+                len(b) for b in blocks
+            )
+            blocks.append(row[occupied].copy())
+        return BlockSparseTexture(
+            np.concatenate(blocks), index, shape, fill_value=fill_value
+        )
+
+    @property
+    def resident_nbytes(self) -> int:
+        return int(self.blocks.nbytes + self.index.nbytes)
+
+    def _gather(self, i: np.ndarray, j: np.ndarray, k: np.ndarray) -> np.ndarray:
+        i, j, k = np.broadcast_arrays(i, j, k)
+        b = self.block_size
+        ids = self.index[i // b, j // b, k // b]
+        values = np.full(ids.shape, self.fill_value, dtype=self.dtype)
+        hit = ids >= 0
+        values[hit] = self.blocks[ids[hit], i[hit] % b, j[hit] % b, k[hit] % b]
+        return values
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        if isinstance(key, tuple) and all(isinstance(k, np.ndarray) for k in key):
+            return self._gather(*key)
+        ranges, dropped = _expand_key(key, self.shape)
+        values = self._gather(*np.ix_(*ranges))
+        return values.squeeze(axis=tuple(dropped)) if dropped else values
+
+    def materialize(self) -> np.ndarray:
+        b = self.block_size
+        nx, ny, nz = self.index.shape
+        padded = np.full((nx * b, ny * b, nz * b), self.fill_value, dtype=self.dtype)
+        for (i, j, k), block_id in np.ndenumerate(self.index):
+            if block_id >= 0:
+                padded[
+                    i * b : (i + 1) * b, j * b : (j + 1) * b, k * b : (k + 1) * b
+                ] = self.blocks[block_id]
+        x, y, z = self.shape
+        return np.ascontiguousarray(padded[:x, :y, :z])
@@ -0,0 +1,263 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from .texture import iter_slabs
+
+KEY_BITS = 16
+"""Bits of the value sort keys resolved per histogram pass (see ``sort_keys()``)."""
+
+PERCENTILE_COLLECT = 1 << 20
+"""Number of candidate values that ``compute_percentiles()`` sorts directly."""
+
+
+@dataclass(frozen=True)
+class DatacubeStats:
+    """
+    Summary statistics of a Datacube image (NaNs are ignored).
+    """
+
+    min: float
+    max: float
+    nan_count: int
+    size: int
+    key_counts: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+    """Histogram of the leading ``KEY_BITS`` of the values' sort keys."""
+
+
+def _key_types(dtype: np.dtype) -> Tuple[np.dtype, np.dtype]:
+    """
+    Float dtype holding the values of ``dtype`` exactly and the unsigned
+    integer dtype of its sort keys.
+    """
+    if np.can_cast(dtype, np.float32):
+        return np.dtype(np.float32), np.dtype(np.uint32)
+    return np.dtype(np.float64), np.dtype(np.uint64)
+
+
+def sort_keys(values: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """
+    Unsigned integer keys with the same order as non-NaN ``values``
+    (IEEE floats with the sign bit flipped and negative values inverted).
+
+    Args:
+        values: Non-NaN values.
+        dtype: Dtype of the texture the values come from.
+    """
+    float_type, key_type = _key_types(dtype)
+    bits = np.ascontiguousarray(values, dtype=float_type).ravel().view(key_type)
+    sign = key_type.type(1 << (8 * key_type.itemsize - 1))
+    return np.where(bits & sign, ~bits, bits | sign)
+
+
+def _key_values(keys: npt.ArrayLike, dtype: np.dtype) -> np.ndarray:
+    """
+    Values of sort keys (inverse of ``sort_keys()``).
+    """
+    float_type, key_type = _key_types(dtype)
+    keys = np.asarray(keys, dtype=key_type)
+    sign = key_type.type(1 << (8 * key_type.itemsize - 1))
+    return np.where(keys & sign, keys ^ sign, ~keys).view(float_type)
+
+
+def compute_stats(texture: Any, key_histogram: bool = False) -> DatacubeStats:
+    """
+    Compute min, max and NaN count of a texture in one pass over its slabs.
+
+    Args:
+        texture: 3D texture (numpy array or lazy texture).
+        key_histogram: Also histogram the sort keys of the values (for
+                       ``compute_percentiles()``) in the same pass.
+    """
+    vmin, vmax, nan_count = np.inf, -np.inf, 0
+    _, key_type = _key_types(texture.dtype)
+    shift = 8 * key_type.itemsize - KEY_BITS
+    key_counts = np.zeros((1 << KEY_BITS,), dtype=np.int64) if key_histogram else None
+    for _, slab in iter_slabs(texture):
+        if slab.dtype.kind in "fc":
+            nans = np.isnan(slab)
+            n = int(np.count_nonzero(nans))
+            nan_count += n
+            if n == slab.size:
+                continue
+            if n > 0:
+                slab = slab[~nans]
+        if slab.size:
+            vmin = min(vmin, float(slab.min()))
+            vmax = max(vmax, float(slab.max()))
+            if key_counts is not None:
+                keys = sort_keys(slab, texture.dtype) >> shift
+                key_counts += np.bincount(
+                    keys.astype(np.intp), minlength=key_counts.size
+                )
+    if vmin > vmax:
+        vmin = vmax = np.nan
+    return DatacubeStats(
+        min=vmin,
+        max=vmax,
+        nan_count=nan_count,
+        size=int(np.prod(texture.shape)),
+        key_counts=key_counts,
+    )
+
+
+def compute_histogram(
+    texture: Any, bins: int, value_range: Tuple[float, float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Histogram of a texture (ignoring NaNs), accumulated over its slabs.
+
+    Returns:
+        Counts and bin edges (as ``np.histogram``).
+    """
+    edges = np.histogram_bin_edges([], bins=bins, range=value_range)
+    counts = np.zeros((bins,), dtype=np.int64)
+    for _, slab in iter_slabs(texture):
+        values = slab[~np.isnan(slab)] if slab.dtype.kind in "fc" else slab
+        counts += np.histogram(values, bins=edges)[0]
+    return counts, edges
+
+
+@dataclass
+class _Rank:
+    """
+    Sort key prefix of the value at a rank, refined over passes.
+    """
+
+    rank: int
+    prefix: int
+    bits: int
+    below: int
+    """Number of values with a smaller prefix."""
+    count: int
+    """Number of values with this prefix."""
+
+    def refine(self, counts: np.ndarray) -> None:
+        """
+        Select the next ``KEY_BITS`` of the prefix from the histogram of
+        the values with this prefix.
+        """
+        cumulative = np.cumsum(counts)
+        b = int(np.searchsorted(cumulative, self.rank - self.below, side="right"))
+        self.below += int(cumulative[b - 1]) if b else 0
+        self.count = int(counts[b])
+        self.prefix = (self.prefix << KEY_BITS) | b
+        self.bits += KEY_BITS
+
+
+def _select_ranks(
+    texture: Any, ranks: Iterable[int], key_counts: np.ndarray
+) -> Dict[int, float]:
+    """
+    Values at ``ranks`` of the sorted non-NaN values of a texture.
+
+    Refines the sort key histogram of ``compute_stats()`` for all ranks
+    together, one pass over the slabs per ``KEY_BITS``, until their
+    candidates are few enough to sort.
+    """
+    _, key_type = _key_types(texture.dtype)
+    key_bits = 8 * key_type.itemsize
+    pending = [_Rank(r, 0, 0, 0, 0) for r in sorted(set(ranks))]
+    for rank in pending:
+        rank.refine(key_counts)
+    while pending[0].bits < key_bits:
+        groups: Dict[int, List[_Rank]] = {}
+        for rank in pending:
+            groups.setdefault(rank.prefix, []).append(rank)
+        shift = key_bits - pending[0].bits
+        collect = sum(g[0].count for g in groups.values()) <= PERCENTILE_COLLECT
+        selected: Dict[int, List[np.ndarray]] = {prefix: [] for prefix in groups}
+        counts = {
+            prefix: np.zeros((1 << KEY_BITS,), dtype=np.int64) for prefix in groups
+        }
+        for _, slab in iter_slabs(texture):
+            slab = np.asarray(slab)
+            if slab.dtype.kind in "fc":
+                slab = slab[~np.isnan(slab)]
+            keys = sort_keys(slab, texture.dtype)
+            for prefix in groups:
+                keys_in = keys[keys >> shift == prefix]
+                if collect:
+                    selected[prefix].append(keys_in)
+                else:
+                    digits = (keys_in >> (shift - KEY_BITS)) & ((1 << KEY_BITS) - 1)
+                    counts[prefix] += np.bincount(
+                        digits.astype(np.intp), minlength=1 << KEY_BITS
+                    )
+        if collect:
+            values: Dict[int, float] = {}
+            for prefix, group in groups.items():
+                keys = np.sort(np.concatenate(selected[prefix]))
+                for rank in group:
+                    value = _key_values(keys[rank.rank - rank.below], texture.dtype)
+                    values[rank.rank] = float(value)
+            return values
+        for prefix, group in groups.items():
+            for rank in group:
+                rank.refine(counts[prefix])
+    # the full keys are known
+    return {
+        rank.rank: float(_key_values(rank.prefix, texture.dtype)) for rank in pending
+    }
+
+
+def compute_percentiles(
+    texture: Any, q: Sequence[float], stats: DatacubeStats
+) -> np.ndarray:
+    """
+    Percentiles of a texture (ignoring NaNs, interpolated linearly as
+    ``np.nanpercentile``).
+
+    Lazy textures are not materialized: all requested ranks are located
+    together by refining the sort key histogram of ``stats`` over passes
+    through their slabs.
+
+    Args:
+        texture: 3D texture (numpy array or lazy texture).
+        q: Percentiles (0 to 100).
+        stats: Statistics of the texture (see ``compute_stats()``).
+    """
+    if isinstance(texture, np.ndarray):
+        if texture.dtype == np.bool_:
+            texture = texture.view(np.uint8)
+        return np.atleast_1d(np.nanpercentile(texture, q))
+    n = stats.size - stats.nan_count
+    if n == 0:
+        return np.full((len(q),), np.nan)
+    key_counts = stats.key_counts
+    if key_counts is None:
+        key_counts = compute_stats(texture, key_histogram=True).key_counts
+        assert key_counts is not None
+    positions = [p / 100 * (n - 1) for p in q]
+    lower = [int(np.floor(p)) for p in positions]
+    upper = [min(r + 1, n - 1) for r in lower]
+    values = _select_ranks(texture, lower + upper, key_counts)
+    return np.array(
+        [
+            values[lo] + (values[up] - values[lo]) * (p - lo)
+            for p, lo, up in zip(positions, lower, upper)
+        ]
+    )
+
+
+def compute_argmax(texture: Any) -> Optional[Tuple[int, ...]]:
+    """
+    Voxel index of the (first) maximum of a texture, ignoring NaNs, found
+    in one pass over its slabs.
+
+    Returns:
+        Voxel index or ``None`` if the texture is all NaN.
+    """
+    best: Optional[Tuple[float, Tuple[int, ...]]] = None
+    for sl, slab in iter_slabs(texture):
+        slab = np.asarray(slab)
+        if slab.dtype.kind in "fc" and np.isnan(slab).all():
+            continue
+        i, j, k = np.unravel_index(np.nanargmax(slab), slab.shape)
+        value = float(slab[i, j, k])
+        voxel = (int(i), int(j), int(k + sl.start))
+        if best is None or value > best[0] or (value == best[0] and voxel < best[1]):
+            best = (value, voxel)
+    return None if best is None else best[1]
@@ -0,0 +1,153 @@
+from abc import ABC, abstractmethod
+from typing import Any, Iterator, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from nibabel.volumeutils import apply_read_scaling
+
+SLAB_BYTES = 32 * 1024 * 1024
+"""Approximate size of the slabs yielded by ``LazyTexture.iter_slabs()``."""
+
+
+class LazyTexture(ABC):
+    """
+    Read-only 3D texture that produces voxel values on demand.
+
+    Implements the ``fineslice`` texture protocol (``ndim``, ``shape`` and
+    ``__getitem__``), so samplers only read the voxels they index.
+    """
+
+    ndim = 3
+
+    def __init__(self, shape: Tuple[int, ...], dtype: npt.DTypeLike) -> None:
+        self.shape: Tuple[int, ...] = tuple(int(s) for s in shape)
+        self.dtype: np.dtype = np.dtype(dtype)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the texture once materialized."""
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    @property
+    def resident_nbytes(self) -> int:
+        """Memory currently held by the texture."""
+        return 0
+
+    @abstractmethod
+    def __getitem__(self, key: Any) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def materialize(self) -> np.ndarray:
+        """
+        Read the full texture into a numpy array.
+        """
+
+    def iter_slabs(
+        self, slab_size: Optional[int] = None
+    ) -> Iterator[Tuple[slice, np.ndarray]]:
+        """
+        Iterate over the texture in slabs along the last axis.
+
+        Args:
+            slab_size: Number of planes per slab
+                       (defaults to roughly ``SLAB_BYTES`` per slab).
+
+        Yields:
+            Tuples of the slab's slice along the last axis and its values.
+        """
+        return iter_slabs(self, slab_size)
+
+
+def iter_slabs(
+    texture: Any, slab_size: Optional[int] = None
+) -> Iterator[Tuple[slice, np.ndarray]]:
+    """
+    Iterate over a texture (numpy array or lazy texture) in slabs along the
+    last axis.
+
+    Args:
+        texture: 3D texture.
+        slab_size: Number of planes per slab
+                   (defaults to roughly ``SLAB_BYTES`` per slab).
+
+    Yields:
+        Tuples of the slab's slice along the last axis and its values.
+    """
+    n = texture.shape[-1]
+    if slab_size is None:
+        plane_bytes = max(1, texture.dtype.itemsize * int(np.prod(texture.shape[:-1])))
+        slab_size = max(1, SLAB_BYTES // plane_bytes)
+    for start in range(0, n, slab_size):
+        sl = slice(start, min(start + slab_size, n))
+        yield sl, texture[:, :, sl]
+
+
+def _is_index_arrays(key: Any) -> bool:
+    return isinstance(key, tuple) and all(
+        isinstance(k, np.ndarray) and k.dtype.kind in "iu" for k in key
+    )
+
+
+class ProxyTexture(LazyTexture):
+    """
+    Lazy texture backed by an on-disk array (e.g. ``np.memmap`` or a
+    nibabel ``ArrayProxy``) in its native dtype.
+
+    Slope and intercept scaling is applied to the voxels as they are read.
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        slope: Optional[float] = 1.0,
+        inter: Optional[float] = 0.0,
+    ) -> None:
+        """
+        Args:
+            source: Unscaled 3D array-like supporting basic slicing.
+            slope: Scaling slope (``scl_slope``).
+            inter: Scaling intercept (``scl_inter``).
+        """
+        self.source = source
+        self.slope = 1.0 if slope is None or np.isnan(slope) else float(slope)
+        self.inter = 0.0 if inter is None or np.isnan(inter) else float(inter)
+        super().__init__(
+            shape=source.shape,
+            dtype=self._scale(np.zeros((1,), dtype=source.dtype)).dtype,
+        )
+        self._materialized: Optional[np.ndarray] = None
+
+    @property
+    def is_scaled(self) -> bool:
+        return (self.slope, self.inter) != (1.0, 0.0)
+
+    @property
+    def resident_nbytes(self) -> int:
+        if self._materialized is None or isinstance(self._materialized, np.memmap):
+            return 0
+        return self._materialized.nbytes
+
+    def _scale(self, values: np.ndarray) -> np.ndarray:
+        return apply_read_scaling(values, self.slope, self.inter)
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        if self._materialized is not None:
+            return self._materialized[key]
+        if isinstance(self.source, np.ndarray) or not _is_index_arrays(key):
+            return self._scale(np.asarray(self.source[key]))
+
+        # Proxies only support basic slicing: read the bounding box of the
+        # requested voxels and gather from that.
+        lo = [int(k.min()) if k.size else 0 for k in key]
+        hi = [int(k.max()) + 1 if k.size else 1 for k in key]
+        block = np.asarray(self.source[tuple(slice(a, b) for a, b in zip(lo, hi))])
+        return self._scale(block[tuple(k - a for k, a in zip(key, lo))])
+
+    def materialize(self) -> np.ndarray:
+        if self._materialized is None:
+            data = self._scale(np.asanyarray(self.source))
+            if data.flags.writeable:
+                data.flags.writeable = False
+            self._materialized = data
+        return self._materialized
@@ -1,3 +1,17 @@
-from .nifti import get_nifti_cube
+from .cache import CacheStats, VolumeCache, volume_cache
+from .nifti import (
+    get_nifti_cube,
+    get_nifti_cubes,
+    iter_nifti_frames,
+    submit_nifti_cube,
+)
 
-__all__ = ["get_nifti_cube"]
+__all__ = [
+    "get_nifti_cube",
+    "get_nifti_cubes",
+    "iter_nifti_frames",
+    "submit_nifti_cube",
+    "CacheStats",
+    "VolumeCache",
+    "volume_cache",
+]
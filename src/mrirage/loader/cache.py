@@ -0,0 +1,145 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple, Union
+
+import numpy as np
+
+from ..datacube.datacube import Datacube
+from ..datacube.lru import CacheStats
+from ..datacube.texture import LazyTexture
+
+
+def _resident_bytes(texture: Union[np.ndarray, LazyTexture]) -> int:
+    """
+    Memory held by a texture (memory-mapped data is not counted).
+    """
+    if isinstance(texture, LazyTexture):
+        return texture.resident_nbytes
+    if isinstance(texture, np.memmap):
+        return 0
+    return texture.nbytes
+
+
+def file_key(file_name: str, *options: Hashable) -> Tuple[Hashable, ...]:
+    """
+    Cache key of a file: its real path, modification time and size
+    (plus any load options).
+    """
+    stat = os.stat(file_name)
+    return (os.path.realpath(file_name), stat.st_mtime_ns, stat.st_size) + options
+
+
+def file_digest(file_name: str) -> str:
+    """
+    Stable digest of a file's real path, modification time and size
+    (for naming on-disk caches derived from the file).
+    """
+    digest = hashlib.sha1(repr(file_key(file_name)).encode())
+    return digest.hexdigest()
+
+
+class VolumeCache:
+    """
+    Thread-safe LRU cache of loaded Datacubes with a memory budget and an
+    entry limit (memory-mapped images do not count towards the budget but
+    hold open files).
+
+    All lookups of one entry share its image data. Each lookup returns a
+    shallow copy, so chained operations like ``apply_gaussian()`` never
+    modify the cached cube.
+    """
+
+    def __init__(self, max_bytes: int = 2 * 1024**3, max_entries: int = 64) -> None:
+        """
+        Args:
+            max_bytes: Budget for the memory held by all cached images.
+            max_entries: Maximum number of cached images.
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Datacube]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks: Dict[Hashable, Tuple[threading.Lock, int]] = {}
+        self._stats = CacheStats()
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                entries=len(self._entries),
+                bytes=self._total_bytes(),
+            )
+
+    def _total_bytes(self) -> int:
+        return sum(_resident_bytes(cube.texture) for cube in self._entries.values())
+
+    def _evict(self) -> None:
+        # Resident size changes when cached lazy textures get materialized,
+        # so the total is re-measured instead of tracked incrementally.
+        while len(self._entries) > max(1, self.max_entries) or (
+            len(self._entries) > 1 and self._total_bytes() > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def get(self, key: Hashable) -> Optional[Datacube]:
+        with self._lock:
+            cube = self._entries.get(key)
+            if cube is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            self._entries.move_to_end(key)
+            return cube.shallow_copy()
+
+    def put(self, key: Hashable, cube: Datacube) -> Datacube:
+        """
+        Add a cube to the cache.
+
+        Returns:
+            Shallow copy of the cached cube.
+        """
+        texture = cube.texture
+        if isinstance(texture, np.ndarray) and texture.flags.writeable:
+            texture.flags.writeable = False
+        with self._lock:
+            self._entries[key] = cube
+            self._entries.move_to_end(key)
+            self._evict()
+            return cube.shallow_copy()
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Datacube]) -> Datacube:
+        """
+        Get a cube or load and cache it. Concurrent calls for the same key
+        wait for a single load.
+        """
+        with self._lock:
+            key_lock, waiting = self._key_locks.get(key, (threading.Lock(), 0))
+            self._key_locks[key] = (key_lock, waiting + 1)
+        try:
+            with key_lock:
+                cube = self.get(key)
+                if cube is None:
+                    cube = self.put(key, load())
+        finally:
+            with self._lock:
+                key_lock, waiting = self._key_locks[key]
+                if waiting == 1:
+                    del self._key_locks[key]
+                else:
+                    self._key_locks[key] = (key_lock, waiting - 1)
+        return cube
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats = CacheStats()
+
+
+volume_cache = VolumeCache()
+"""Process-wide cache used by ``get_nifti_cube()``."""
@@ -0,0 +1,29 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def frame_index(shape: Sequence[int], frame: Optional[int] = None) -> Tuple[int, ...]:
+    """
+    Index of a 3D frame in the trailing (4th and higher) dimensions of an
+    image.
+
+    Args:
+        shape: Image shape.
+        frame: Frame number (may be omitted for single-frame images).
+
+    Returns:
+        Index into the trailing dimensions (empty for 3D images).
+    """
+    extra = tuple(shape[3:])
+    n_frames = int(np.prod(extra))
+    if frame is None:
+        if n_frames > 1:
+            raise ValueError(
+                f"Image has {n_frames} frames, select one with 'frame' "
+                "(or use iter_nifti_frames())."
+            )
+        frame = 0
+    if not 0 <= frame < n_frames:
+        raise IndexError(f"Frame {frame} out of range for {n_frames} frames.")
+    return tuple(int(i) for i in np.unravel_index(frame, extra, order="F"))
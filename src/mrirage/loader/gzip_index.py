@@ -0,0 +1,165 @@
+import os
+import threading
+import warnings
+from typing import Any, Optional, Tuple
+
+import nibabel as nib
+import numpy as np
+from nibabel.fileslice import fileslice
+
+from ..datacube.datacube import Datacube
+from ..datacube.texture import ProxyTexture
+from .cache import file_digest
+from .common import frame_index
+
+GZIP_INDEX_SUFFIX = ".gzidx"
+"""File name suffix of persisted gzip indices."""
+
+GZIP_INDEX_SPACING = 1024 * 1024
+"""Uncompressed bytes between gzip index seek points."""
+
+
+class FileSliceSource:
+    """
+    Unscaled voxel data in a seekable file object, read with nibabel's
+    ``fileslice`` (only the bytes covered by a slice are read).
+    """
+
+    def __init__(
+        self,
+        fileobj: Any,
+        shape: Tuple[int, ...],
+        dtype: np.dtype,
+        offset: int,
+        order: str = "F",
+        frame_key: Tuple[int, ...] = (),
+    ) -> None:
+        """
+        Args:
+            fileobj: Open file object.
+            shape: Shape of the image in the file.
+            dtype: On-disk dtype.
+            offset: Offset of the image data in the file.
+            order: Memory layout of the image data.
+            frame_key: Index into the trailing (4th and higher) dimensions
+                       selecting the 3D frame exposed by this source.
+        """
+        self.fileobj = fileobj
+        self.file_shape = tuple(int(s) for s in shape)
+        self.frame_key = frame_key
+        self.shape = self.file_shape[: len(self.file_shape) - len(frame_key)]
+        self.ndim = len(self.shape)
+        self.dtype = np.dtype(dtype)
+        self.offset = offset
+        self.order = order
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        key = key + (slice(None),) * (self.ndim - len(key)) + self.frame_key
+        return fileslice(
+            self.fileobj,
+            key,
+            self.file_shape,
+            self.dtype,
+            self.offset,
+            order=self.order,
+            lock=self._lock,
+        )
+
+    def __array__(self, dtype: Optional[np.dtype] = None) -> np.ndarray:
+        data = self[(slice(None),) * self.ndim]
+        return data if dtype is None else data.astype(dtype)
+
+
+def gzip_index_path(file_name: str, index_dir: Optional[str] = None) -> str:
+    """
+    Location of the persisted gzip index of a file.
+
+    Args:
+        file_name: Gzip file.
+        index_dir: Index directory. Defaults to a sidecar file next to
+                   ``file_name``.
+
+    Returns:
+        Index file name.
+    """
+    if index_dir is None:
+        return file_name + GZIP_INDEX_SUFFIX
+    return os.path.join(index_dir, file_digest(file_name) + GZIP_INDEX_SUFFIX)
+
+
+def open_indexed_gzip(file_name: str, index_dir: Optional[str] = None) -> Any:
+    """
+    Open a gzip file for random access, importing its persisted seek-point
+    index or building (and persisting) it if missing or outdated.
+
+    Requires the optional ``indexed_gzip`` package (``mrirage[gzip]``
+    extra).
+
+    Args:
+        file_name: Gzip file.
+        index_dir: Index directory (see ``gzip_index_path()``).
+
+    Returns:
+        ``indexed_gzip.IndexedGzipFile``
+    """
+    try:
+        import indexed_gzip
+    except ImportError as e:
+        raise ImportError(
+            "Random access to gzip files requires the 'indexed_gzip' package, "
+            "install it with 'pip install mrirage[gzip]'."
+        ) from e
+
+    index_file = gzip_index_path(file_name, index_dir)
+    if os.path.exists(index_file) and (
+        os.path.getmtime(index_file) >= os.path.getmtime(file_name)
+    ):
+        return indexed_gzip.IndexedGzipFile(
+            file_name, spacing=GZIP_INDEX_SPACING, index_file=index_file
+        )
+
+    gz = indexed_gzip.IndexedGzipFile(file_name, spacing=GZIP_INDEX_SPACING)
+    gz.build_full_index()
+    try:
+        if index_dir is not None:
+            os.makedirs(index_dir, exist_ok=True)
+        gz.export_index(index_file + ".tmp")
+        os.replace(index_file + ".tmp", index_file)
+    except OSError as e:
+        warnings.warn(f"Could not persist gzip index '{index_file}': {e}")
+    return gz
+
+
+def load_indexed_nifti(
+    file_name: str, index_dir: Optional[str] = None, frame: Optional[int] = None
+) -> Datacube:
+    """
+    Load a gzip compressed nifti file (frame) lazily through a gzip index,
+    so sampling only inflates the parts of the file it reads.
+
+    Args:
+        file_name: Nifti file (``.nii.gz``).
+        index_dir: Index directory (see ``gzip_index_path()``).
+        frame: Frame of a 4D image.
+
+    Returns:
+        Lazy Datacube.
+    """
+    gz = open_indexed_gzip(file_name, index_dir)
+    header = nib.Nifti1Header.from_fileobj(gz)
+    slope, inter = header.get_slope_inter()
+    shape = header.get_data_shape()
+    source = FileSliceSource(
+        gz,
+        shape=shape,
+        dtype=header.get_data_dtype(),
+        offset=int(header.get_data_offset()),
+        frame_key=frame_index(shape, frame),
+    )
+    return Datacube(
+        ProxyTexture(source, slope=slope, inter=inter),  # type: ignore
+        header.get_best_affine(),
+    )
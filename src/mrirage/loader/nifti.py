@@ -1,26 +1,332 @@
-from typing import TypeVar, Union
+import os
+import shutil
+import threading
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import (
+    Any,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
 
 import nibabel as nib
+import numpy as np
+from nibabel.openers import Opener
 from nibabel.spatialimages import SpatialImage as NibabelImage
 
 from ..datacube.datacube import Datacube
+from ..datacube.shared import SharedDatacube
+from ..datacube.texture import LazyTexture, ProxyTexture
+from .cache import file_digest, file_key, volume_cache
+from .common import frame_index
+from .gzip_index import load_indexed_nifti
 
 T = TypeVar("T")
 
+VOLUME_CACHE_SUFFIX = ".mrcache"
+"""Directory name suffix of bricked volume caches in ``cache_dir``."""
 
-def get_nifti_cube(image: Union[str, NibabelImage, T]) -> Union[Datacube, T]:
+
+def _is_compressed(file_name: Optional[str]) -> bool:
+    return file_name is None or any(
+        file_name.endswith(ext) for ext in Opener.compress_ext_map if ext is not None
+    )
+
+
+def _nifti_texture(
+    img: NibabelImage, lazy: bool, frame: Optional[int] = None
+) -> Union[np.ndarray, LazyTexture]:
+    """
+    Image data (of one frame) in its on-disk dtype. Uncompressed files are
+    memory-mapped and read on demand if ``lazy``, everything else is read
+    into memory.
+    """
+    dataobj: Any = img.dataobj
+    key = (slice(None),) * 3 + frame_index(img.shape, frame)
+    if lazy and nib.is_proxy(dataobj) and not _is_compressed(img.get_filename()):
+        return ProxyTexture(
+            dataobj.get_unscaled()[key], slope=dataobj.slope, inter=dataobj.inter
+        )
+    if len(img.shape) == 3:
+        return np.asanyarray(dataobj)
+    return np.asanyarray(dataobj[key])
+
+
+def _load_nifti_file(
+    file_name: str,
+    lazy: bool,
+    gzip_index: bool,
+    index_dir: Optional[str],
+    frame: Optional[int] = None,
+) -> Datacube:
+    if lazy and gzip_index and file_name.endswith(".gz"):
+        try:
+            return load_indexed_nifti(file_name, index_dir, frame)
+        except ImportError:
+            warnings.warn(
+                "Random access to gzip files requires the 'indexed_gzip' "
+                "package (install it with 'pip install mrirage[gzip]'), "
+                "loading the full image instead."
+            )
+    img = nib.nifti1.Nifti1Image.from_filename(file_name, mmap="r" if lazy else False)
+    return Datacube(_nifti_texture(img, lazy, frame), img.affine)
+
+
+def _load_cached_nifti_file(
+    file_name: str,
+    cache_dir: str,
+    lazy: bool,
+    gzip_index: bool,
+    index_dir: Optional[str],
+    frame: Optional[int] = None,
+) -> Datacube:
+    """
+    Load a file (frame) from its volume cache in ``cache_dir``, converting it
+    first if needed.
+    """
+    name = file_digest(file_name) + ("" if frame is None else f".{frame}")
+    path = os.path.join(cache_dir, name + VOLUME_CACHE_SUFFIX)
+    if not os.path.exists(path):
+        cube = _load_nifti_file(file_name, lazy, gzip_index, index_dir, frame)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        cube.save_cache(tmp_path)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # converted concurrently by another process or thread
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    return Datacube.load_cache(path)
+
+
+def _prepare(cube: Datacube, crop: bool, sparse: bool, reorient: bool) -> Datacube:
+    if reorient:
+        cube = cube.reorient()
+    return cube.crop(sparse=sparse) if crop or sparse else cube
+
+
+def get_nifti_cube(
+    image: Union[str, NibabelImage, T],
+    lazy: bool = True,
+    cache: bool = True,
+    gzip_index: bool = False,
+    index_dir: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    frame: Optional[int] = None,
+    crop: bool = False,
+    sparse: bool = False,
+    reorient: bool = False,
+) -> Union[Datacube, T]:
     """
-    Load a nifti image into a Datacube.
+    Load a nifti image (or one frame of a 4D image) into a Datacube.
+
+    The image keeps its on-disk dtype (with ``scl_slope``/``scl_inter``
+    applied). Uncompressed files are memory-mapped if ``lazy``, so only
+    the voxels that are sampled are read.
+
+    With ``gzip_index``, ``.nii.gz`` files are loaded lazily as well: a
+    seek-point index is built once and persisted (next to the file or in
+    ``index_dir``), after which sampling only inflates the parts of the
+    file it reads. This requires the optional ``indexed_gzip`` package
+    (``mrirage[gzip]`` extra).
+
+    With ``cache_dir``, files are converted once into a bricked, uncompressed
+    volume cache (see ``Datacube.save_cache()``) that later loads
+    memory-map with near-zero startup cost.
+
+    With ``crop``, the image is cropped to the bounding box of its non-zero
+    voxels (see ``Datacube.crop()``), optionally stored block-sparse. Use
+    this for masks, atlases and thresholded stat maps.
+
+    With ``reorient``, the image is reoriented once to canonical RAS+ voxel
+    order (see ``Datacube.reorient()``) so views slice it by plain indexing.
+
+    Files are decoded once and shared through ``volume_cache`` (keyed by
+    path, modification time and size) unless ``cache`` is disabled.
+    Cached images are read-only.
+
+    Handles from ``Datacube.to_shared()`` (e.g. passed to worker processes)
+    are mapped without copying.
 
     Args:
         image: Image to load.
+        lazy: Memory-map uncompressed files instead of reading them.
+        cache: Use the process-wide volume cache for files.
+        gzip_index: Random access to gzip compressed files through an index.
+        index_dir: Directory for gzip indices (defaults to sidecar files).
+        cache_dir: Directory for bricked volume caches.
+        frame: Frame of a 4D image (only reads that frame).
+        crop: Crop the image to its non-zero voxels.
+        sparse: Crop the image and store it block-sparse.
+        reorient: Reorient the image to canonical RAS+ voxel order.
 
     Returns:
         Datacube containing the image.
     """
     if isinstance(image, str):
-        img = nib.nifti1.load(image)
-        return Datacube(img.get_fdata(caching="unchanged"), img.affine)
+        file_name = image
+
+        def load() -> Datacube:
+            if cache_dir is not None:
+                cube = _load_cached_nifti_file(
+                    file_name, cache_dir, lazy, gzip_index, index_dir, frame
+                )
+            else:
+                cube = _load_nifti_file(file_name, lazy, gzip_index, index_dir, frame)
+            return _prepare(cube, crop, sparse, reorient)
+
+        if not cache:
+            return load()
+        return volume_cache.get_or_load(
+            file_key(
+                file_name,
+                lazy,
+                gzip_index and lazy,
+                cache_dir,
+                frame,
+                crop,
+                sparse,
+                reorient,
+            ),
+            load,
+        )
+    if isinstance(image, SharedDatacube):
+        return Datacube.from_shared(image)
     if isinstance(image, NibabelImage):
-        return Datacube(image.get_fdata(), image.affine)
+        cube = Datacube(_nifti_texture(image, lazy, frame), image.affine)
+        return _prepare(cube, crop, sparse, reorient)
     return image
+
+
+def iter_nifti_frames(
+    image: Union[str, NibabelImage], lazy: bool = True
+) -> Iterator[Datacube]:
+    """
+    Stream the 3D frames of a (4D) nifti image as Datacubes.
+
+    Frames are read one at a time (compressed files are inflated
+    sequentially), so memory stays bounded by a single frame. Frames are
+    not added to the volume cache.
+
+    Args:
+        image: Image to load.
+        lazy: Memory-map frames of uncompressed files instead of reading them.
+
+    Yields:
+        One Datacube per frame.
+    """
+    img = (
+        nib.nifti1.Nifti1Image.from_filename(
+            image, mmap="r" if lazy else False, keep_file_open=True
+        )
+        if isinstance(image, str)
+        else image
+    )
+    for frame in range(int(np.prod(img.shape[3:]))):
+        yield Datacube(_nifti_texture(img, lazy, frame), img.affine)
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _loader_pool() -> ThreadPoolExecutor:
+    """
+    Shared thread pool for background loads (gzip inflation and numpy
+    release the GIL, so loads overlap).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=min(8, os.cpu_count() or 1),
+                thread_name_prefix="mrirage-loader",
+            )
+        return _pool
+
+
+def submit_nifti_cube(
+    image: Union[str, NibabelImage, T], **kwargs: Any
+) -> "Future[Union[Datacube, T]]":
+    """
+    Load a nifti image into a Datacube in the shared loader thread pool.
+
+    Args:
+        image: Image to load.
+        **kwargs: Passed to ``get_nifti_cube()``.
+
+    Returns:
+        Future of the Datacube.
+    """
+    return _loader_pool().submit(lambda: get_nifti_cube(image, **kwargs))
+
+
+@overload
+def get_nifti_cubes(
+    images: Sequence[Union[str, NibabelImage]],
+    max_workers: Optional[int] = None,
+    ordered: Literal[True] = True,
+    **kwargs: Any,
+) -> List[Datacube]:
+    ...
+
+
+@overload
+def get_nifti_cubes(
+    images: Sequence[Union[str, NibabelImage]],
+    max_workers: Optional[int] = None,
+    *,
+    ordered: Literal[False],
+    **kwargs: Any,
+) -> Iterator[Tuple[int, Datacube]]:
+    ...
+
+
+def get_nifti_cubes(
+    images: Sequence[Union[str, NibabelImage]],
+    max_workers: Optional[int] = None,
+    ordered: bool = True,
+    **kwargs: Any,
+) -> Union[List[Datacube], Iterator[Tuple[int, Datacube]]]:
+    """
+    Load many nifti images concurrently.
+
+    Args:
+        images: Images to load.
+        max_workers: Number of loader threads
+                     (defaults to the number of images, at most CPU count).
+        ordered: Return a list in input order. Otherwise return an iterator
+                 of ``(index, cube)`` tuples in order of completion.
+        **kwargs: Passed to ``get_nifti_cube()``.
+
+    Returns:
+        List of Datacubes or completion iterator.
+    """
+    if max_workers is None:
+        max_workers = max(1, min(len(images), os.cpu_count() or 1))
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="mrirage-loader"
+    )
+    futures = {
+        executor.submit(get_nifti_cube, image, **kwargs): i  # type: ignore
+        for i, image in enumerate(images)
+    }
+    executor.shutdown(wait=False)
+
+    if ordered:
+        results: List[Datacube] = [None] * len(images)  # type: ignore
+        for future, i in futures.items():
+            results[i] = future.result()  # type: ignore
+        return results
+
+    def _completed() -> Iterator[Tuple[int, Datacube]]:
+        for future in as_completed(futures):
+            yield futures[future], future.result()  # type: ignore
+
+    return _completed()
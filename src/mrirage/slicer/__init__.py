@@ -1,8 +1,32 @@
 from .bounds import bounds_cube, bounds_manual, bounds_mni_cube, bounds_where
+from .clusters import Cluster, find_clusters, find_peak
+from .projection import apply_voxelwise, project_volume, project_volumes
+from .sample import (
+    SliceCache,
+    SliceGrid,
+    sample_slice,
+    sample_slice_aligned,
+    slice_cache,
+    slice_grid,
+    slice_grid_cache,
+)
 
 __all__ = [
     "bounds_cube",
     "bounds_manual",
     "bounds_mni_cube",
     "bounds_where",
+    "Cluster",
+    "find_clusters",
+    "find_peak",
+    "apply_voxelwise",
+    "project_volume",
+    "project_volumes",
+    "SliceCache",
+    "SliceGrid",
+    "sample_slice",
+    "sample_slice_aligned",
+    "slice_cache",
+    "slice_grid",
+    "slice_grid_cache",
 ]
@@ -1,20 +1,57 @@
-from typing import Sequence, Tuple, Union
+from typing import Optional, Sequence, Tuple, Union
 
 import numpy as np
 
+from ..datacube.datacube import Datacube
+
 
 def bounds_manual(p1: Sequence, p2: Sequence) -> np.ndarray:
     return np.vstack((np.vstack((p1, p2)).T, (0, 0)))
 
 
 def bounds_where(
-    bool_image: np.ndarray, affine: np.ndarray, margin: float = 0.0
+    bool_image: Union[np.ndarray, Datacube, Sequence[Datacube]],
+    affine: Optional[np.ndarray] = None,
+    margin: float = 0.0,
+    threshold: Optional[float] = None,
 ) -> np.ndarray:
-    wpos = np.where(bool_image)
-    wpos = np.vstack(wpos + (np.ones(wpos[0].shape[0]),))  # type: ignore
+    """
+    World bounds of the non-zero voxels of an image (or of the union of
+    several cubes).
+
+    The voxel bounding box is found from per-axis projections and only its
+    corners are transformed, so no voxel coordinates are materialized.
+    Deferred expressions (e.g. ``cube > 3.1``) are evaluated slab by slab.
+    Threshold queries on cubes use their brick index (see
+    ``Datacube.voxel_bounds()``).
+
+    Args:
+        bool_image: Boolean image, Datacube or list of Datacubes.
+        affine: Affine matrix (only for numpy images).
+        margin: Margin added to the bounds (in world units).
+        threshold: Only include voxels above this value (instead of the
+                   non-zero voxels).
+
+    Returns:
+        Bounds.
+    """
+    if isinstance(bool_image, np.ndarray):
+        assert affine is not None, "bounds_where() of an array needs an affine"
+        bool_image = [Datacube(bool_image, affine)]
+    elif isinstance(bool_image, Datacube):
+        bool_image = [bool_image]
 
-    wpos_trans = np.dot(affine, wpos)
+    corners = []
+    for cube in bool_image:
+        box = cube.voxel_bounds(threshold)
+        if box is None:
+            continue
+        voxels = np.meshgrid(*[(s.start, s.stop - 1) for s in box], [1])
+        corners.append(cube.transform(np.array(voxels).reshape(4, -1)))
+    if len(corners) == 0:
+        raise ValueError("bounds_where() of an empty image")
 
+    wpos_trans = np.hstack(corners)
     return np.vstack(
         [np.min(wpos_trans, axis=1) - margin, np.max(wpos_trans, axis=1) + margin]
     ).T
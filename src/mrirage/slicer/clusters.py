@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from scipy import ndimage
+
+from ..datacube.datacube import Datacube
+from ..datacube.stats import compute_argmax
+
+
+@dataclass(frozen=True)
+class Cluster:
+    """
+    Connected cluster of suprathreshold voxels.
+    """
+
+    peak: np.ndarray
+    """World coordinates of the peak voxel."""
+    peak_voxel: np.ndarray
+    """Voxel index of the peak."""
+    peak_value: float
+    size: int
+    """Number of voxels."""
+    volume: float
+    """Volume in world units."""
+
+
+def _find_clusters(
+    cube: Datacube, threshold: float, connectivity: int
+) -> List[Cluster]:
+    box = cube.voxel_bounds(threshold)
+    if box is None:
+        return []
+    values = np.asarray(cube.texture[box])
+    labels, count = ndimage.label(
+        values > threshold,
+        structure=ndimage.generate_binary_structure(3, connectivity),
+    )
+
+    # sort voxels by cluster, then value: the last voxel of a cluster is its peak
+    flat_labels = labels.ravel()
+    inside = np.flatnonzero(flat_labels)
+    cluster = flat_labels[inside]
+    order = np.lexsort((values.ravel()[inside], cluster))
+    last = np.append(np.flatnonzero(np.diff(cluster[order])), len(order) - 1)
+    peaks = inside[order[last]]
+
+    sizes = np.bincount(cluster, minlength=count + 1)[1:]
+    peak_voxels = np.column_stack(np.unravel_index(peaks, values.shape))
+    peak_voxels += [s.start for s in box]
+    peak_world = cube.transform_points(peak_voxels)
+    voxel_volume = float(np.prod(cube.voxel_size))
+
+    return [
+        Cluster(
+            peak=peak_world[i],
+            peak_voxel=peak_voxels[i],
+            peak_value=float(values.ravel()[peaks[i]]),
+            size=int(sizes[i]),
+            volume=float(sizes[i]) * voxel_volume,
+        )
+        for i in np.argsort(-sizes, kind="stable")
+    ]
+
+
+def find_clusters(
+    cube: Datacube, threshold: float, connectivity: int = 3
+) -> List[Cluster]:
+    """
+    Find the connected clusters of voxels above a threshold (e.g. of a
+    stat map). Results are cached per cube, threshold and connectivity.
+
+    Args:
+        cube: Image.
+        threshold: Cluster forming threshold.
+        connectivity: Neighbourhood of connected voxels (``1``: faces,
+                      ``2``: faces and edges, ``3``: faces, edges and
+                      corners).
+
+    Returns:
+        Clusters sorted by size (largest first).
+    """
+    return cube._cached(
+        ("clusters", float(threshold), connectivity),
+        lambda: _find_clusters(cube, threshold, connectivity),
+    )
+
+
+def find_peak(cube: Datacube, threshold: Optional[float] = None) -> np.ndarray:
+    """
+    World coordinates of the peak of the largest cluster above
+    ``threshold`` (or of the maximum voxel without a threshold).
+
+    Falls back to the maximum voxel if no voxel exceeds ``threshold``
+    (raises ``ValueError`` if the image is all NaN).
+
+    Args:
+        cube: Image.
+        threshold: Cluster forming threshold.
+    """
+    if threshold is not None:
+        clusters = find_clusters(cube, threshold)
+        if len(clusters) > 0:
+            return clusters[0].peak
+
+    def peak() -> np.ndarray:
+        voxel = compute_argmax(cube.texture)
+        if voxel is None:
+            raise ValueError("Image is all NaN")
+        return cube.transform_points(np.array(voxel))
+
+    return cube._cached("peak", peak)
@@ -0,0 +1,97 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+INTERPOLATIONS = ("nearest", "linear", "cubic")
+"""Interpolation methods of ``interpolate()``."""
+
+ROWS_PER_TASK = 64
+"""Output rows interpolated per thread pool task."""
+
+
+def _taps(
+    coordinates: np.ndarray, size: int, method: str
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Voxel indices (clipped to the image) and float32 weights of the
+    interpolation kernel along one voxel axis.
+    """
+    base = np.floor(coordinates)
+    t = (coordinates - base).astype(np.float32)
+    base = base.astype(np.intp)
+    if method == "linear":
+        offsets = [0, 1]
+        weights = [1 - t, t]
+    else:
+        # cubic convolution (Keys, a = -0.5), i.e. Catmull-Rom splines
+        t2 = t * t
+        t3 = t2 * t
+        offsets = [-1, 0, 1, 2]
+        weights = [
+            (-t3 + 2 * t2 - t) / 2,
+            (3 * t3 - 5 * t2 + 2) / 2,
+            (-3 * t3 + 4 * t2 + t) / 2,
+            (t3 - t2) / 2,
+        ]
+    return [
+        ((base + offset).clip(0, size - 1), weight)
+        for offset, weight in zip(offsets, weights)
+    ]
+
+
+def _interpolate_rows(texture: Any, voxels: np.ndarray, method: str) -> np.ndarray:
+    taps = [_taps(voxels[i], texture.shape[i], method) for i in range(3)]
+    out = np.zeros(voxels.shape[1:], dtype=np.float32)
+    for (i, wi), (j, wj), (k, wk) in itertools.product(*taps):
+        values = np.asarray(texture[i, j, k], dtype=np.float32)
+        out += wi * wj * wk * values
+    return out
+
+
+def interpolate(
+    texture: Any,
+    voxels: np.ndarray,
+    method: str = "linear",
+    max_workers: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Sample a texture at (fractional) voxel coordinates.
+
+    Interpolation is vectorized over the output pixels, accumulating in
+    float32, so the cost is bounded by the number of output pixels. Voxels
+    outside the image repeat the edge voxels.
+
+    Args:
+        texture: 3D texture (numpy array or lazy texture).
+        voxels: Voxel coordinates (array of shape ``(3, rows, ...)``).
+        method: Interpolation method (see ``INTERPOLATIONS``).
+        max_workers: Threads interpolating blocks of rows in parallel
+                     (defaults to the ``ThreadPoolExecutor`` default).
+
+    Returns:
+        Interpolated values (float32, shape ``voxels.shape[1:]``).
+    """
+    if method not in INTERPOLATIONS:
+        raise ValueError(
+            f"Unknown interpolation '{method}' (expected one of {INTERPOLATIONS})"
+        )
+    if method == "nearest":
+        index = tuple(
+            voxels[i].astype(np.intp).clip(0, texture.shape[i] - 1) for i in range(3)
+        )
+        return np.asarray(texture[index], dtype=np.float32)
+
+    rows = voxels.shape[1]
+    if rows <= ROWS_PER_TASK:
+        return _interpolate_rows(texture, voxels, method)
+    out = np.empty(voxels.shape[1:], dtype=np.float32)
+
+    def task(start: int) -> None:
+        stop = start + ROWS_PER_TASK
+        out[start:stop] = _interpolate_rows(texture, voxels[:, start:stop], method)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(task, range(0, rows, ROWS_PER_TASK)))
+    return out
@@ -0,0 +1,181 @@
+import functools
+import itertools
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import fineslice as fine
+import numpy as np
+import numpy.typing as npt
+
+from ..datacube.datacube import Datacube
+from .sample import SliceCache, slice_cache
+
+REDUCTIONS: Dict[str, Callable[..., np.ndarray]] = {
+    "sum": np.nansum,
+    "max": np.nanmax,
+}
+"""Reductions of ``project_volume()`` (NaN voxels are ignored)."""
+
+
+def apply_voxelwise(
+    function: Callable[[Datacube], Datacube],
+    raster: np.ndarray,
+    precision: Optional[npt.DTypeLike] = None,
+) -> np.ndarray:
+    """
+    Apply a voxel-wise Datacube function (e.g. an alpha map like
+    ``lambda image: abs(image) > 1.8``) to sampled data.
+
+    Args:
+        function: Voxel-wise function.
+        raster: Sampled 2D or 3D data.
+        precision: Float dtype of processing results.
+
+    Returns:
+        Result of the same shape as ``raster``.
+    """
+    cube = Datacube(
+        np.array(raster).reshape(raster.shape + (1,) * (3 - raster.ndim)),
+        np.eye(4),
+        precision=precision,
+    )
+    result = function(cube)
+    values = result.image if isinstance(result, Datacube) else result
+    return np.asarray(values).reshape(raster.shape)
+
+
+Projection = Tuple[str, Optional[Callable[[Datacube], Datacube]]]
+"""Reduction (see ``REDUCTIONS``) and optional voxel-wise function."""
+
+
+def project_volumes(
+    cube: Datacube,
+    view_axis: int,
+    projections: Sequence[Projection],
+    bounds: Optional[np.ndarray] = None,
+    cache: Optional[SliceCache] = slice_cache,
+) -> List[Optional[fine.types.SamplerResultND]]:
+    """
+    Several projections of a cube along a world axis (e.g. a glass brain
+    view and its alpha map) from a single resampling of the cube.
+
+    The cube is resampled once (``fineslice.sample_3d()``) and reduced
+    along all three axes in parallel. All projections along all three axes
+    are cached, so the other views of a composition (and later renders)
+    reuse them.
+
+    Args:
+        cube: Cube to project.
+        view_axis: World axis to project along.
+        projections: Reduction along the axis and voxel-wise function
+                     applied to the resampled volume before projecting
+                     (see ``apply_voxelwise()``) of each projection.
+        bounds: World bounds of the resampled volume.
+        cache: Slice cache (``None`` to disable caching).
+
+    Returns:
+        Projections and their world extent, or ``None`` if the bounds do
+        not intersect the image.
+    """
+    keys: List[Hashable] = [
+        (
+            "projection",
+            cube.version,
+            cube.affine.tobytes(),
+            None if bounds is None else np.asarray(bounds, dtype=np.float64).tobytes(),
+            reduction,
+            function,
+        )
+        for reduction, function in projections
+    ]
+
+    def project() -> List[List[Optional[fine.types.SamplerResultND]]]:
+        sample = fine.sample_3d(
+            texture=cube.texture,  # type: ignore
+            affine=cube.affine,
+            out_bounds=bounds,
+        )
+        if sample is None:
+            return [[None] * 3 for _ in projections]
+        resampled = np.asarray(sample.texture)
+        volumes = [
+            resampled
+            if function is None
+            else apply_voxelwise(function, resampled, cube.precision)
+            for _, function in projections
+        ]
+
+        def reduce(task: Tuple[int, int]) -> np.ndarray:
+            i, axis = task
+            return REDUCTIONS[projections[i][0]](volumes[i], axis=axis)
+
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", r"All-NaN slice encountered")
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                rasters = list(
+                    executor.map(
+                        reduce, itertools.product(range(len(projections)), range(3))
+                    )
+                )
+        results: List[List[Optional[fine.types.SamplerResultND]]] = [
+            [
+                fine.types.SamplerResultND(
+                    rasters[3 * i + a], np.delete(sample.coordinates, a, axis=0)
+                )
+                for a in range(3)
+            ]
+            for i in range(len(projections))
+        ]
+        if cache is not None:
+            for key, result in zip(keys, results):
+                for a in range(3):
+                    if a != view_axis:
+                        cache.put((key, a), result[a])
+        return results
+
+    if cache is None:
+        return [result[view_axis] for result in project()]
+
+    computed: List[List[List[Optional[fine.types.SamplerResultND]]]] = []
+
+    def compute(i: int) -> Optional[fine.types.SamplerResultND]:
+        # a single resampling for all projections missing from the cache
+        if not computed:
+            computed.append(project())
+        return computed[0][i][view_axis]
+
+    return [
+        cache.get_or_compute((key, view_axis), functools.partial(compute, i))
+        for i, key in enumerate(keys)
+    ]
+
+
+def project_volume(
+    cube: Datacube,
+    view_axis: int,
+    bounds: Optional[np.ndarray] = None,
+    reduction: str = "sum",
+    function: Optional[Callable[[Datacube], Datacube]] = None,
+    cache: Optional[SliceCache] = slice_cache,
+) -> Optional[fine.types.SamplerResultND]:
+    """
+    Project a cube along a world axis (e.g. a glass brain view).
+
+    See ``project_volumes()``, which also computes several projections of
+    the same cube together.
+
+    Args:
+        cube: Cube to project.
+        view_axis: World axis to project along.
+        bounds: World bounds of the resampled volume.
+        reduction: Reduction along the axis (see ``REDUCTIONS``).
+        function: Voxel-wise function applied to the resampled volume
+                  before projecting (see ``apply_voxelwise()``).
+        cache: Slice cache (``None`` to disable caching).
+
+    Returns:
+        Projection and its world extent, or ``None`` if the bounds do not
+        intersect the image.
+    """
+    return project_volumes(cube, view_axis, [(reduction, function)], bounds, cache)[0]
@@ -0,0 +1,300 @@
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+import fineslice as fine
+import numpy as np
+from fineslice.cuboid import cuboid, cuboid_edges
+from fineslice.intersect import intersect_polygon_plane
+
+from ..datacube.datacube import Datacube
+from ..datacube.lru import LRUCache
+from .interpolate import interpolate
+
+
+def sample_slice_aligned(
+    cube: Datacube,
+    view_axis: int,
+    position: fine.types.SamplerPoint,
+) -> Optional[fine.types.SamplerResultND]:
+    """
+    Nearest neighbour slice of an axis-aligned cube by plain indexing
+    (a strided view of numpy images, no resampling).
+
+    Matches ``fineslice.sample_2d()`` without bounds: the slice has the two
+    in-plane world axes as rows and columns (in increasing world order and
+    direction). Bounded slices are left to ``slice_grid()``, which
+    reproduces the sampling grid of ``fineslice``.
+
+    Args:
+        cube: Cube with an axis-aligned affine (``cube.affine_info``).
+        view_axis: World axis orthogonal to the slice.
+        position: World point on the slice.
+
+    Returns:
+        Slice and its world extent, or ``None`` if the slice does not
+        intersect the image.
+    """
+    info = cube.affine_info
+    assert info.axis_aligned, "sample_slice_aligned() needs an axis-aligned cube"
+    voxel_axes = [info.axis_permutation.index(w) for w in range(3)]
+    affine = cube.affine
+
+    key: List[Any] = [slice(None)] * 3
+    v = voxel_axes[view_axis]
+    c = (position[view_axis] - affine[view_axis, 3]) / affine[view_axis, v]
+    if not 0 <= c <= cube.shape[v] - 1:
+        return None
+    key[v] = int(c)
+
+    extent = np.zeros((2, 2))
+    plane_axes = [w for w in range(3) if w != view_axis]
+    for row, w in enumerate(plane_axes):
+        u = voxel_axes[w]
+        scale, offset, n = affine[w, u], affine[w, 3], cube.shape[u]
+        extent[row] = np.sort([offset, offset + scale * (n - 1)])
+        key[u] = slice(None, None, -1) if info.axis_flip[u] else slice(None)
+
+    raster = cube.texture[tuple(key)]
+    if voxel_axes[plane_axes[0]] > voxel_axes[plane_axes[1]]:
+        raster = raster.T
+    return fine.types.SamplerResultND(raster, extent)
+
+
+SLICE_GRID_CACHE_BYTES = 64 * 1024**2
+"""Memory budget of the sampling grid cache."""
+
+
+@dataclass(frozen=True)
+class SliceGrid:
+    """
+    Voxel coordinates of the pixels of a 2D slice through a voxel grid.
+    """
+
+    voxels: np.ndarray
+    """Voxel coordinates (array of shape ``(3,) + slice shape``)."""
+    index: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    """Nearest neighbour voxel indices per voxel axis (clipped to the grid)."""
+    coordinates: np.ndarray
+    """World extent of the slice (in-plane axes by min/max)."""
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.voxels.nbytes) + sum(int(i.nbytes) for i in self.index)
+
+    def gather(self, texture: Any, interpolation: str = "nearest") -> np.ndarray:
+        """
+        Sample a texture (numpy array or lazy texture) on the grid.
+
+        Args:
+            texture: Texture on the grid's voxel grid.
+            interpolation: Interpolation method (see ``INTERPOLATIONS``).
+        """
+        if interpolation == "nearest":
+            return np.asarray(texture[self.index])
+        return interpolate(texture, self.voxels, interpolation)
+
+
+def _slice_grid(
+    affine: np.ndarray,
+    shape: Tuple[int, ...],
+    view_axis: int,
+    offset: float,
+    bounds: Optional[np.ndarray],
+    out_resolution: Optional[Tuple[int, int]],
+) -> Optional[SliceGrid]:
+    position = np.ones(4)
+    position[view_axis] = offset
+    inters = intersect_polygon_plane(
+        np.dot(affine, cuboid(shape)),
+        cuboid_edges(),
+        plane_origin=position[:3],
+        plane_normal=np.eye(3)[view_axis],
+    )
+    if inters is None or inters.shape[1] < 3:
+        return None
+
+    plane_axes = [a for a in range(3) if a != view_axis]
+    extent = np.empty((2, 2))
+    for row, a in enumerate(plane_axes):
+        values = inters[a] if bounds is None else bounds[a, :2]
+        extent[row] = np.min(values), np.max(values)
+
+    affine_inv = np.linalg.inv(affine)
+    if out_resolution is None:
+        # voxel resolution: lengths of the rectangle's sides in voxel space
+        rect = np.ones((4, 4))
+        rect[plane_axes] = [
+            extent[0, [0, 1, 1, 0]],
+            extent[1, [0, 0, 1, 1]],
+        ]
+        rect[view_axis] = offset
+        voxels = np.dot(affine_inv, rect)
+        sides = np.linalg.norm(voxels - np.roll(voxels, -1, axis=1), axis=0)
+        wn = int(np.ceil(max(sides[0], sides[2]))) + 1
+        hn = int(np.ceil(max(sides[1], sides[3]))) + 1
+    else:
+        hn, wn = map(int, out_resolution)
+
+    grid = np.ones((4, wn * hn))
+    grid[plane_axes] = np.mgrid[
+        extent[0, 0] : extent[0, 1] : complex(wn),
+        extent[1, 0] : extent[1, 1] : complex(hn),
+    ].reshape(2, -1)
+    grid[view_axis] = offset
+    voxels = np.dot(affine_inv[:3], grid).reshape((3, wn, hn))
+    index = tuple(voxels[i].astype(np.intp).clip(0, shape[i] - 1) for i in range(3))
+    voxels.flags.writeable = False
+    for i in index:
+        i.flags.writeable = False
+    return SliceGrid(voxels, index, extent)
+
+
+def slice_grid(
+    affine: np.ndarray,
+    shape: Tuple[int, ...],
+    view_axis: int,
+    position: fine.types.SamplerPoint,
+    bounds: Optional[np.ndarray] = None,
+    out_resolution: Optional[Tuple[int, int]] = None,
+) -> Optional[SliceGrid]:
+    """
+    Sampling grid of a slice through a voxel grid, computed once per
+    (affine, shape, view) and shared by all cubes on that grid (e.g. layers
+    and their alpha maps). Matches ``fineslice.sample_2d()``.
+
+    Args:
+        affine: Voxel to world affine.
+        shape: Voxel grid shape.
+        view_axis: World axis orthogonal to the slice.
+        position: World point on the slice.
+        bounds: World bounds of the slice.
+        out_resolution: Slice resolution (``fineslice`` order, i.e. columns
+                        then rows). Defaults to the voxel resolution.
+
+    Returns:
+        Sampling grid, or ``None`` if the slice does not intersect the grid.
+    """
+    bounds = None if bounds is None else np.asarray(bounds, dtype=np.float64)
+    offset = float(position[view_axis])
+    resolution = (
+        None
+        if out_resolution is None
+        else (int(out_resolution[0]), int(out_resolution[1]))
+    )
+    key = (
+        affine.tobytes(),
+        tuple(shape),
+        view_axis,
+        offset,
+        None if bounds is None else bounds.tobytes(),
+        resolution,
+    )
+    return slice_grid_cache.get_or_compute(
+        key,
+        lambda: _slice_grid(affine, shape, view_axis, offset, bounds, resolution),
+    )
+
+
+slice_grid_cache: LRUCache[Optional[SliceGrid]] = LRUCache(SLICE_GRID_CACHE_BYTES)
+"""Process-wide cache used by ``slice_grid()``."""
+
+
+class SliceCache(LRUCache[Optional[fine.types.SamplerResultND]]):
+    """
+    Thread-safe LRU cache of sampled slices with a memory budget.
+
+    Slices are keyed by their cube (version and affine) and sampling
+    parameters, so re-rendering a view (e.g. after a style change or at
+    another DPI) never samples the same slice twice. Cached slices are
+    read-only copies that do not reference the sampled volume.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024**2) -> None:
+        """
+        Args:
+            max_bytes: Budget for the memory held by all cached slices.
+        """
+        super().__init__(max_bytes)
+
+    def _nbytes(self, value: Optional[fine.types.SamplerResultND]) -> int:
+        return 0 if value is None else int(value.texture.nbytes)
+
+    def _prepare(
+        self, value: Optional[fine.types.SamplerResultND]
+    ) -> Optional[fine.types.SamplerResultND]:
+        if value is None:
+            return None
+        if value.texture.base is not None:
+            # views (e.g. of sample_slice_aligned()) would keep the whole
+            # source volume alive, uncounted by the budget
+            value = value._replace(texture=np.array(value.texture))
+        value.texture.flags.writeable = False
+        return value
+
+
+slice_cache = SliceCache()
+"""Process-wide cache used by ``sample_slice()`` and ``project_volume()``."""
+
+
+def sample_slice(
+    cube: Datacube,
+    view_axis: int,
+    position: fine.types.SamplerPoint,
+    bounds: Optional[np.ndarray] = None,
+    out_resolution: Optional[Tuple[int, int]] = None,
+    interpolation: str = "nearest",
+    cache: Optional[SliceCache] = slice_cache,
+) -> Optional[fine.types.SamplerResultND]:
+    """
+    Sample a 2D slice of a cube (see ``fineslice.sample_2d()``).
+
+    Unbounded nearest neighbour slices of axis-aligned cubes are taken by
+    plain indexing (``sample_slice_aligned()``), other slices are gathered (or
+    interpolated) on the shared sampling grid of the cube's voxel grid
+    (``slice_grid()``). Slices are cached in ``cache``.
+
+    Args:
+        cube: Cube to sample.
+        view_axis: World axis orthogonal to the slice.
+        position: World point on the slice.
+        bounds: World bounds of the slice.
+        out_resolution: Slice resolution (``fineslice`` order, i.e. columns
+                        then rows). Defaults to the cube's voxel resolution.
+        interpolation: Interpolation method (see ``INTERPOLATIONS``).
+        cache: Slice cache (``None`` to disable caching).
+
+    Returns:
+        Slice and its world extent, or ``None`` if the slice does not
+        intersect the image.
+    """
+
+    def sample() -> Optional[fine.types.SamplerResultND]:
+        if (
+            bounds is None
+            and out_resolution is None
+            and interpolation == "nearest"
+            and cube.affine_info.axis_aligned
+        ):
+            return sample_slice_aligned(cube, view_axis, position)
+        grid = slice_grid(
+            cube.affine, cube.shape, view_axis, position, bounds, out_resolution
+        )
+        if grid is None:
+            return None
+        return fine.types.SamplerResultND(
+            grid.gather(cube.texture, interpolation), grid.coordinates
+        )
+
+    if cache is None:
+        return sample()
+    key = (
+        cube.version,
+        cube.affine.tobytes(),
+        view_axis,
+        # only the offset along the view axis selects the slice
+        float(position[view_axis]),
+        None if bounds is None else np.asarray(bounds, dtype=np.float64).tobytes(),
+        None if out_resolution is None else tuple(int(n) for n in out_resolution),
+        interpolation,
+    )
+    return cache.get_or_compute(key, sample)
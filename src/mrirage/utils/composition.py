@@ -9,16 +9,19 @@ from ..composition.layer import Style
 
 def quick_add_xyz(
     composition: Composition,
-    origin: Optional[fine.types.SamplerPointLike],
+    origin: Optional[Union[fine.types.SamplerPointLike, str]],
     bounds: Optional[np.ndarray] = None,
+    peak_threshold: Optional[float] = None,
 ) -> None:
     """
     Add three views to a composition, one for each axis.
 
     Args:
         composition: Composition to add views to.
-        origin: Origin of the views.
+        origin: Origin of the views (or ``"auto-peak"``, see ``View``).
         bounds: Bounds of the views.
+        peak_threshold: Cluster forming threshold of ``"auto-peak"``
+                        (see ``quick_xyz()``).
 
     Returns:
         None
@@ -30,13 +33,14 @@ def quick_add_xyz(
                 view_axis=i,
                 origin=origin if origin is not None else (0, 0, 0),
                 bounds=bounds,
+                peak_threshold=peak_threshold,
             )
         )
 
 
 def quick_xyz(
     layers: Optional[List[Layer]],
-    origin: Optional[fine.types.SamplerPointLike] = None,
+    origin: Optional[Union[fine.types.SamplerPointLike, str]] = None,
     bounds: Optional[np.ndarray] = None,
     figure_size: Optional[Union[float, Tuple[float, float]]] = None,
     dpi: int = 200,
@@ -44,13 +48,16 @@ def quick_xyz(
     nbreak: int = 3,
     legend_scale: float = 0.6,
     style: Optional[Style] = None,
+    peak_threshold: Optional[float] = None,
 ) -> CompositionGrid:
     """
     Create a composition with three views, one for each axis.
 
     Args:
         layers: Layers to add to the composition.
-        origin: Origin of the views.
+        origin: Origin of the views (or ``"auto-peak"`` to center the views
+                on the peak of the largest cluster of the top voxel layer,
+                see ``find_peak()``).
         bounds: Bounds of the views.
         figure_size: Size of the figure.
         dpi: DPI of the figure.
@@ -58,6 +65,9 @@ def quick_xyz(
         nbreak: Number of elements in a row.
         legend_scale: Scale of the legend.
         style: Style of the composition.
+        peak_threshold: Cluster forming threshold of ``"auto-peak"``
+                        (without a threshold, or if no voxel exceeds it,
+                        the views are centered on the maximum voxel).
 
     Returns:
         CompositionGrid
@@ -71,5 +81,5 @@ def quick_xyz(
         legend_scale=legend_scale,
         style=style,
     )
-    quick_add_xyz(composition, origin, bounds)
+    quick_add_xyz(composition, origin, bounds, peak_threshold)
     return composition
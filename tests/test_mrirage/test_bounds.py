@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from mrirage import Datacube, bounds_where
+
+
+def _bounds_where_reference(
+    bool_image: np.ndarray, affine: np.ndarray, margin: float = 0.0
+) -> np.ndarray:
+    wpos = np.where(bool_image)
+    wpos = np.vstack(wpos + (np.ones(wpos[0].shape[0]),))  # type: ignore
+    wpos_trans = np.dot(affine, wpos)
+    return np.vstack(
+        [np.min(wpos_trans, axis=1) - margin, np.max(wpos_trans, axis=1) + margin]
+    ).T
+
+
+def test_bounds_where() -> None:
+    dat = np.zeros((20, 21, 22))
+    dat[3:9, 10, 4:15] = 2.0
+    dat[15, 2, 20] = 5.0
+    aff = np.diag([2.0, -1.0, 1.5, 1.0])
+    aff[:3, 3] = (-10, 5, 3)
+    cube = Datacube(dat, aff)
+
+    assert np.allclose(
+        bounds_where(dat > 0, aff, margin=2), _bounds_where_reference(dat > 0, aff, 2)
+    )
+    assert np.allclose(bounds_where(cube), _bounds_where_reference(dat > 0, aff))
+    assert np.allclose(
+        bounds_where(cube, threshold=3), _bounds_where_reference(dat > 3, aff)
+    )
+    assert np.allclose(bounds_where(cube > 3), _bounds_where_reference(dat > 3, aff))
+
+    other = np.zeros(dat.shape)
+    other[0, 0, 0] = 1
+    assert np.allclose(
+        bounds_where([cube, Datacube(other, aff)]),
+        _bounds_where_reference((dat > 0) | (other > 0), aff),
+    )
+
+    with pytest.raises(ValueError):
+        bounds_where(cube, threshold=10)
+
+
+def test_brick_index() -> None:
+    dat = np.random.default_rng(0).random((40, 37, 35))
+    dat[5, 30, 20] = 2.0
+    dat[33, 6, 3] = 1.5
+    dat[0, 0, 0] = np.nan
+    cube = Datacube(dat, np.eye(4))
+
+    index = cube.brick_index
+    assert index.max.shape == (3, 3, 3)
+    assert np.isclose(index.max[0, 1, 1], 2.0)
+    assert cube.brick_index is index
+
+    for threshold in (0.5, 1.2, 1.7):
+        assert np.allclose(
+            bounds_where(cube > threshold),
+            _bounds_where_reference(dat > threshold, np.eye(4)),
+        )
+    assert cube.voxel_bounds(3.0) is None
+    assert np.array_equal(cube.slices_above(1.2, axis=1), [6, 30])
+
+    mask = (cube > 1.2).texture
+    idx = (np.array([5, 33, 10]), np.array([30, 6, 10]), np.array([20, 3, 10]))
+    assert np.array_equal(mask[idx], [True, True, False])
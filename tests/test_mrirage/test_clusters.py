@@ -0,0 +1,44 @@
+import matplotlib
+import numpy as np
+
+from mrirage import Datacube, LayerVoxel, find_clusters, find_peak, quick_xyz
+
+matplotlib.use("Agg")
+
+
+def _stat_map() -> Datacube:
+    dat = np.zeros((20, 20, 20))
+    dat[2:5, 2:5, 2:5] = 3.0
+    dat[3, 3, 3] = 4.0
+    dat[12:14, 12:14, 12:14] = 5.0
+    dat[13, 12, 13] = 6.0
+    aff = np.diag([2.0, 2.0, 2.0, 1.0])
+    aff[:3, 3] = -20
+    return Datacube(dat, aff)
+
+
+def test_find_clusters() -> None:
+    cube = _stat_map()
+    clusters = find_clusters(cube, threshold=2.0)
+    assert [c.size for c in clusters] == [27, 8]
+    assert np.array_equal(clusters[0].peak_voxel, [3, 3, 3])
+    assert np.allclose(clusters[0].peak, [-14, -14, -14])
+    assert clusters[1].peak_value == 6.0
+    assert clusters[1].volume == 64.0
+    assert find_clusters(cube, threshold=2.0) is clusters
+    assert find_clusters(cube, threshold=10.0) == []
+
+    assert np.allclose(find_peak(cube), [6, 4, 6])
+    assert np.allclose(find_peak(cube, threshold=2.0), [-14, -14, -14])
+    # no cluster above the threshold: maximum voxel
+    assert np.allclose(find_peak(cube, threshold=10.0), [6, 4, 6])
+
+
+def test_auto_peak_origin() -> None:
+    cube = _stat_map()
+    composition = quick_xyz([LayerVoxel(cube)], origin="auto-peak", peak_threshold=2.0)
+    figure = composition.render()
+    assert figure is not None
+    # every view slices through the peak of the largest cluster
+    rasters = [ax.images[0].get_array() for ax in figure.axes]
+    assert [raster.max() for raster in rasters] == [4.0] * 3  # type: ignore
@@ -1,6 +1,12 @@
+from pathlib import Path
+
 import numpy as np
+import pytest
+from scipy.ndimage import gaussian_filter
 
-from mrirage import Datacube
+from mrirage import Datacube, find_peak
+from mrirage.datacube import clear_resample_cache, resample_cache, stats
+from mrirage.datacube.texture import ProxyTexture
 
 
 def test_matinv_identity() -> None:
@@ -11,3 +17,250 @@ def test_matinv_identity() -> None:
 
     cube = Datacube(dat, aff)
     assert np.all(cube.affine == cube.affine_inv)
+
+
+def test_volume_cache_roundtrip(tmp_path: Path) -> None:
+    dat = np.random.default_rng(0).random((37, 20, 33)).astype(np.float32)
+    aff = np.diag([2.0, 2.0, 2.0, 1.0])
+
+    Datacube(dat, aff).save_cache(tmp_path / "cube", brick_size=16)
+    cube = Datacube.load_cache(tmp_path / "cube")
+
+    assert cube.is_lazy
+    assert np.array_equal(cube.affine, aff)
+    assert np.array_equal(cube.texture[:, 5, :], dat[:, 5, :])
+    assert np.array_equal(cube.texture[36, :, 1:30:3], dat[36, :, 1:30:3])
+    idx = (np.array([0, 36, 17]), np.array([19, 0, 3]), np.array([32, 16, 0]))
+    assert np.array_equal(cube.texture[idx], dat[idx])
+    assert np.array_equal(cube.image, dat)
+
+
+def test_deferred_operators() -> None:
+    dat = np.random.default_rng(0).standard_normal((10, 11, 12))
+    cube = Datacube(dat, np.eye(4))
+
+    mask = abs(cube * 2.0 - 1) > 1.8
+    assert mask.is_lazy
+    assert mask.dtype == np.bool_
+    expected = np.abs(dat * 2.0 - 1) > 1.8
+    idx = (np.array([0, 9]), np.array([3, 10]), np.array([11, 4]))
+    assert np.array_equal(mask.texture[idx], expected[idx])
+    assert np.array_equal(mask.image, expected)
+    assert not mask.is_lazy
+
+    for compared in (cube > 0.5, cube >= 0.5, cube < 0.5, cube <= 0.5):
+        assert compared.dtype == np.bool_
+    for compared in (cube == cube, cube != 0.5, cube >= cube * 0.5):
+        assert compared.dtype == np.bool_
+    assert np.array_equal((cube >= 0.5).image, dat >= 0.5)
+
+
+def test_packed_masks() -> None:
+    dat = np.random.default_rng(0).standard_normal((10, 11, 13))
+    cube = Datacube(dat, np.eye(4))
+
+    low, high = (cube < -0.5).pack(), (cube > 0.5).pack()
+    assert low.texture.resident_nbytes == 10 * 11 * 2  # type: ignore
+    assert np.array_equal(low.texture.materialize(), dat < -0.5)  # type: ignore
+
+    either = low | high
+    assert isinstance(either.texture, type(low.texture))
+    expected = (dat < -0.5) | (dat > 0.5)
+    idx = (np.array([0, 9, 5]), np.array([3, 10, 0]), np.array([12, 4, 7]))
+    assert np.array_equal(either.texture[idx], expected[idx])
+    assert np.array_equal((~either).image, ~expected)
+    assert np.array_equal((either & (cube > 0)).image, dat > 0.5)
+
+
+def test_precision_and_in_place() -> None:
+    dat = np.random.default_rng(0).integers(-100, 100, (10, 11, 12), dtype=np.int16)
+    cube = Datacube(dat, np.eye(4))
+
+    cube.normalize()
+    assert cube.image.dtype == np.float32
+    assert np.allclose(cube.image, (dat - dat.min()) / np.ptp(dat))
+
+    image = cube.image
+    expected = gaussian_filter(image, sigma=1.5)
+    cube.apply_gaussian(sigma=1.5, out=image).normalize(out=image)
+    assert cube.image is image
+    assert np.allclose(image, (expected - expected.min()) / np.ptp(expected))
+
+    cube.apply(np.sqrt, out=image)
+    assert cube.image is image
+
+    half = Datacube(dat, np.eye(4), precision=np.float16).apply_gaussian(sigma=1)
+    assert half.image.dtype == np.float16
+
+
+def test_parallel_roi_gaussian() -> None:
+    dat = np.random.default_rng(0).random((20, 22, 24))
+    aff = np.diag([2.0, 2.0, 2.0, 1.0])
+    expected = gaussian_filter(dat, sigma=(1, 2, 1.5))
+
+    cube = Datacube(dat, aff, precision=np.float64)
+    cube.apply_gaussian(sigma=(1, 2, 1.5), max_workers=3)
+    assert np.allclose(cube.image, expected)
+
+    bounds = np.array([[10.0, 20.0], [8.0, 30.0], [0.0, 14.0]])
+    roi = Datacube(dat, aff, precision=np.float64).apply_gaussian(
+        sigma=(1, 2, 1.5), bounds=bounds
+    )
+    inside = (slice(5, 11), slice(4, 16), slice(0, 8))
+    assert np.allclose(roi.image[inside], expected[inside])
+    outside = np.ones(dat.shape, dtype=bool)
+    outside[inside] = False
+    assert np.array_equal(roi.image[outside], dat[outside])
+
+
+def test_cached_stats() -> None:
+    dat = np.arange(4 * 5 * 6, dtype=np.float64).reshape((4, 5, 6))
+    dat[0, 0, 0] = np.nan
+    cube = Datacube(dat, np.eye(4))
+
+    stats = cube.stats
+    assert (stats.min, stats.max, stats.nan_count) == (1, 119, 1)
+    assert cube.stats is stats
+    assert cube.histogram(bins=4)[0].sum() == dat.size - 1
+    assert np.isclose(cube.percentile(50), np.nanpercentile(dat, 50))
+
+    copy = cube.shallow_copy()
+    assert copy.stats is stats
+
+    cube.normalize()
+    assert cube.stats is not stats
+    assert (cube.stats.min, cube.stats.max) == (0, 1)
+    assert copy.stats is stats
+
+
+def test_lazy_percentile_and_peak(monkeypatch: pytest.MonkeyPatch) -> None:
+    # refine the histogram over several passes
+    monkeypatch.setattr(stats, "PERCENTILE_COLLECT", 100)
+    rng = np.random.default_rng(0)
+    dat = (rng.exponential(size=(20, 21, 22)) * 100).astype(np.int16)
+    dat[:5] = 0
+    cube = Datacube(ProxyTexture(dat, slope=0.5), np.eye(4))
+    expected = dat * 0.5
+
+    q = [0.0, 2.5, 30.0, 50.0, 99.0, 100.0]
+    assert np.allclose(cube.percentile(q), np.nanpercentile(expected, q))
+    peak = np.unravel_index(np.argmax(expected), expected.shape)
+    assert np.allclose(find_peak(cube), peak)
+    assert cube.is_lazy
+
+    # the first pass histogram is built with the statistics
+    assert cube.stats.key_counts is not None
+    assert Datacube(expected, np.eye(4)).stats.key_counts is None
+    noisy = rng.normal(size=(9, 10, 11)) * 1e3
+    noisy[noisy > 1e3] = np.nan
+    cube = Datacube(ProxyTexture(noisy), np.eye(4))
+    assert np.allclose(cube.percentile(q), np.nanpercentile(noisy, q))
+
+
+def test_pyramid() -> None:
+    dat = np.random.default_rng(0).random((9, 8, 8))
+    aff = np.diag([0.5, 0.5, 0.5, 1.0])
+    aff[:3, 3] = -2
+    cube = Datacube(dat, aff)
+
+    level = cube.pyramid_level(1)
+    assert level.shape == (5, 4, 4)
+    assert np.isclose(level.image[0, 0, 0], dat[:2, :2, :2].mean())
+    # level voxel centers lie at the center of their 2x2x2 input block
+    assert np.allclose(
+        level.transform([0, 0, 0, 1]), cube.transform([0.5, 0.5, 0.5, 1])
+    )
+    assert cube.pyramid_level(1) is level
+    assert cube.pyramid_level(2).shape == (3, 2, 2)
+
+    assert cube.pyramid_level_for(0.4) == 0
+    assert cube.pyramid_level_for(1.2) == 1
+    assert cube.pyramid_level_for(2.0) == 2
+
+    t1 = Datacube((dat[:8] * 200).astype(np.uint8), aff)
+    level = t1.pyramid_level(1)
+    assert level.dtype == np.uint8
+    block = t1.image[2:4, :2, 4:6].astype(float)
+    assert level.image[1, 0, 2] == np.rint(block.mean())
+
+    labels = Datacube(np.arange(8 * 8 * 8).reshape((8, 8, 8)), aff)
+    level = labels.pyramid_level(1, labels=True)
+    assert np.array_equal(level.image, labels.image[::2, ::2, ::2])
+    assert np.allclose(level.affine, np.dot(aff, np.diag([2.0, 2.0, 2.0, 1.0])))
+    mask = Datacube(dat > 0.5, aff)
+    assert np.array_equal(mask.pyramid_level(1).image, mask.image[::2, ::2, ::2])
+
+
+def test_crop_sparse() -> None:
+    dat = np.zeros((40, 41, 42))
+    dat[10:14, 20:30, 5:7] = 2.0
+    dat[30, 35, 38] = 3.0
+    dat[0, 0, 0] = np.nan
+    cube = Datacube(dat, np.eye(4))
+
+    cropped = (cube == 2).crop()
+    assert cropped.shape == (6, 12, 4)
+    assert np.allclose(cropped.transform([1, 1, 1, 1]), [10, 20, 5, 1])
+
+    sparse = cube.crop(margin=0, sparse=True, block_size=4)
+    assert sparse.is_lazy
+    assert sparse.texture.resident_nbytes < dat.nbytes  # type: ignore
+    assert np.array_equal(sparse.image, dat[10:31, 20:36, 5:39], equal_nan=True)
+    i, j, k = np.array([0, 3, 20]), np.array([0, 9, 15]), np.array([0, 1, 33])
+    assert np.array_equal(sparse.texture[i, j, k], [2.0, 2.0, 3.0])
+
+
+def test_batch_transforms_and_affine_info() -> None:
+    aff = np.array(
+        [[0, 0, 2.0, -10], [-2.0, 0, 0, 20], [0, 3.0, 0, 5], [0, 0, 0, 1]],
+    )
+    cube = Datacube(np.zeros((4, 5, 6)), aff)
+
+    points = np.random.default_rng(0).random((100, 3)) * 5
+    world = cube.transform_points(points)
+    assert world.shape == (100, 3)
+    assert np.allclose(world, cube.transform(np.vstack((points.T, np.ones(100))))[:3].T)
+    assert np.allclose(cube.transform_points_inv(world), points)
+    homogeneous = np.column_stack((points, np.ones(100)))
+    assert np.allclose(cube.transform_points(homogeneous)[:, :3], world)
+
+    info = cube.affine_info
+    assert np.allclose(info.voxel_size, [2, 3, 2])
+    assert info.axis_permutation == (1, 2, 0)
+    assert info.axis_flip == (True, False, False)
+    assert info.axis_aligned
+    assert np.allclose(info.world_bounds, [[-10, 0], [14, 20], [5, 17], [1, 1]])
+    assert cube.affine_info is info
+
+    cube.affine = np.array([[1, 0.5, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+    assert not cube.affine_info.axis_aligned
+
+
+def test_cube_cube_operators() -> None:
+    dat = np.arange(4 * 4 * 4, dtype=np.float64).reshape((4, 4, 4))
+    cube = Datacube(dat, np.eye(4))
+    assert np.array_equal((cube - cube).image, np.zeros(dat.shape))
+
+    # mask covering the second half of the x axis on a shifted grid
+    shift = np.eye(4)
+    shift[0, 3] = 2
+    mask = Datacube(np.ones((2, 4, 4), dtype=bool), shift)
+    masked = cube * mask
+    expected = np.zeros(dat.shape)
+    expected[2:] = dat[2:]
+    assert np.array_equal(masked.image, expected)
+
+    clear_resample_cache()
+    resampled = mask.resample_to(cube)
+    assert resampled.dtype == np.bool_
+    assert mask.resample_to(cube).image is resampled.image
+    assert mask.resample_to(cube, order=1).image is not resampled.image
+    stats = resample_cache.stats
+    assert (stats.hits, stats.misses, stats.entries) == (1, 2, 2)
+    assert stats.bytes == 2 * resampled.image.nbytes
+
+    # shallow copies share the version, not the affine
+    moved = mask.shallow_copy()
+    moved.affine = np.eye(4)
+    moved.affine_inv = np.eye(4)
+    assert np.array_equal(moved.resample_to(cube).image[:2], mask.image)
@@ -0,0 +1,65 @@
+from typing import List, Tuple
+
+import matplotlib
+import numpy as np
+import pytest
+
+from mrirage import Datacube, LayerVoxel, LayerVoxelGlass, quick_xyz
+
+matplotlib.use("Agg")
+
+
+def _alphas(layer: LayerVoxel) -> List[np.ndarray]:
+    figure = quick_xyz([layer], origin=(5, 6, 7)).render()
+    assert figure is not None
+    figure.canvas.draw()
+    alphas = [np.asarray(ax.images[0].get_alpha()) for ax in figure.axes]
+    assert all(alpha.dtype == np.float64 for alpha in alphas)
+    return alphas
+
+
+def test_alpha_voxelwise() -> None:
+    dat = np.random.default_rng(0).normal(size=(20, 22, 24))
+    cube = Datacube(dat, np.eye(4))
+    shapes: List[Tuple[int, ...]] = []
+
+    def alpha_map(image: Datacube) -> Datacube:
+        shapes.append(image.shape)
+        return abs(image) > 1.0
+
+    for cls in (LayerVoxel, LayerVoxelGlass):
+        shapes.clear()
+        local = _alphas(cls(cube, alpha_map=alpha_map))
+        # evaluated on the sampled data only
+        assert shapes
+        if cls is LayerVoxel:
+            assert len(shapes) == 3 and all(s[2] == 1 for s in shapes)
+
+        shapes.clear()
+        volume = _alphas(cls(cube, alpha_map=alpha_map, alpha_voxelwise=False))
+        assert shapes == [dat.shape]
+        for a, b in zip(local, volume):
+            assert np.array_equal(a, b)
+
+        faded = _alphas(cls(cube, alpha_map=alpha_map, alpha=0.5))
+        for a, b in zip(faded, local):
+            assert np.allclose(a, b * 0.5)
+
+
+def test_interp_data() -> None:
+    dat = np.random.default_rng(0).random((8, 9, 10))
+    cube = Datacube(dat, np.diag([4.0, 4.0, 4.0, 1.0]))
+    nearest = quick_xyz([LayerVoxel(cube)], origin=(14, 16, 18)).render()
+    linear = quick_xyz(
+        [LayerVoxel(cube, interp_data="linear", alpha_map=cube > 0.5)],
+        origin=(14, 16, 18),
+    ).render()
+    assert nearest is not None and linear is not None
+    for ax_nearest, ax_linear in zip(nearest.axes, linear.axes):
+        image = ax_linear.images[0]
+        # sampled at screen resolution instead of voxel resolution
+        assert image.get_array().size > ax_nearest.images[0].get_array().size  # type: ignore
+        assert np.shape(image.get_alpha()) == image.get_array().shape  # type: ignore
+
+    with pytest.raises(ValueError):
+        LayerVoxel(cube, interp_data="quintic")
@@ -0,0 +1,271 @@
+import gc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import nibabel as nib
+import numpy as np
+import pytest
+
+from mrirage import (
+    Datacube,
+    SharedDatacube,
+    VolumeCache,
+    get_nifti_cube,
+    get_nifti_cubes,
+    iter_nifti_frames,
+)
+from mrirage.datacube import shared
+from mrirage.loader.cache import file_key
+
+
+def _write_nifti(path: str, data: np.ndarray, slope: float = 1.0) -> None:
+    img = nib.Nifti1Image(data, np.diag([2.0, 2.0, 2.0, 1.0]))
+    img.header.set_slope_inter(slope, 0.0)
+    nib.save(img, path)
+
+
+def test_lazy_native_dtype(tmp_path: Path) -> None:
+    data = np.arange(4 * 5 * 6, dtype=np.int16).reshape((4, 5, 6))
+    path = str(tmp_path / "image.nii")
+    _write_nifti(path, data)
+
+    cube = get_nifti_cube(path)
+    assert cube.is_lazy
+    assert cube.dtype == np.int16
+    idx = (np.array([0, 3]), np.array([1, 4]), np.array([2, 5]))
+    assert np.array_equal(cube.texture[idx], data[idx])
+    assert cube.value_range() == (0, data.max())
+    assert cube.is_lazy
+
+    assert np.array_equal(cube.image, data)
+    assert not cube.is_lazy
+
+
+def test_lazy_scaling(tmp_path: Path) -> None:
+    data = np.arange(4 * 5 * 6, dtype=np.int16).reshape((4, 5, 6))
+    path = str(tmp_path / "image.nii")
+    _write_nifti(path, data, slope=0.5)
+
+    cube = get_nifti_cube(path)
+    assert cube.dtype.kind == "f"
+    assert np.allclose(cube.texture[1, 2, 3], data[1, 2, 3] * 0.5)
+    assert np.allclose(cube.image, data * 0.5)
+
+
+def test_compressed_eager(tmp_path: Path) -> None:
+    data = np.random.default_rng(0).random((4, 5, 6)).astype(np.float32)
+    path = str(tmp_path / "image.nii.gz")
+    _write_nifti(path, data)
+
+    cube = get_nifti_cube(path)
+    assert not cube.is_lazy
+    assert cube.dtype == np.float32
+    assert np.array_equal(cube.image, data)
+
+
+def test_volume_cache(tmp_path: Path) -> None:
+    data = np.ones((4, 5, 6), dtype=np.float32)
+    path = str(tmp_path / "image.nii.gz")
+    _write_nifti(path, data)
+    cache = VolumeCache(max_bytes=data.nbytes)
+
+    def load() -> Datacube:
+        return get_nifti_cube(path, cache=False)
+
+    cube_a = cache.get_or_load(file_key(path), load)
+    cube_b = cache.get_or_load(file_key(path), load)
+    assert cube_a is not cube_b
+    assert cube_a.image is cube_b.image
+    assert not cube_a.image.flags.writeable
+
+    cube_a.apply_gaussian(sigma=1)
+    assert cube_a.image is not cube_b.image
+
+    other = str(tmp_path / "other.nii.gz")
+    _write_nifti(other, data)
+    cache.get_or_load(file_key(other), lambda: get_nifti_cube(other, cache=False))
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.evictions) == (1, 2, 1)
+    assert stats.entries == 1
+
+
+def test_volume_cache_max_entries(tmp_path: Path) -> None:
+    # memory-mapped images hold no resident memory, only open files
+    data = np.ones((4, 5, 6), dtype=np.float32)
+    cache = VolumeCache(max_entries=3)
+    for i in range(10):
+        path = str(tmp_path / f"image_{i}.nii")
+        _write_nifti(path, data)
+        cube = cache.get_or_load(
+            file_key(path), lambda: get_nifti_cube(path, cache=False)
+        )
+        assert cube.is_lazy
+    stats = cache.stats
+    assert stats.bytes == 0
+    assert (stats.entries, stats.evictions) == (3, 7)
+
+
+def test_get_nifti_cubes(tmp_path: Path) -> None:
+    paths = []
+    for i in range(4):
+        paths.append(str(tmp_path / f"image_{i}.nii.gz"))
+        _write_nifti(paths[-1], np.full((4, 5, 6), i, dtype=np.float32))
+
+    cubes = get_nifti_cubes(paths, max_workers=2, cache=False)
+    assert [float(cube.image[0, 0, 0]) for cube in cubes] == [0, 1, 2, 3]
+
+    completed = dict(get_nifti_cubes(paths, cache=False, ordered=False))
+    assert sorted(completed) == [0, 1, 2, 3]
+    assert all(float(completed[i].image[0, 0, 0]) == i for i in completed)
+
+
+def test_gzip_index(tmp_path: Path) -> None:
+    pytest.importorskip("indexed_gzip")
+    data = np.random.default_rng(0).random((20, 30, 40)).astype(np.float32)
+    path = str(tmp_path / "image.nii.gz")
+    _write_nifti(path, data)
+
+    cube = get_nifti_cube(path, cache=False, gzip_index=True)
+    assert cube.is_lazy
+    assert (tmp_path / "image.nii.gz.gzidx").exists()
+    assert np.array_equal(cube.texture[:, :, 17], data[:, :, 17])
+    idx = (np.array([1, 19]), np.array([0, 29]), np.array([5, 39]))
+    assert np.array_equal(cube.texture[idx], data[idx])
+
+    cube = get_nifti_cube(path, cache=False, gzip_index=True)
+    assert np.array_equal(cube.image, data)
+
+    data_4d = np.stack([data, -data], axis=-1)
+    _write_nifti(path, data_4d)
+    cube = get_nifti_cube(path, cache=False, gzip_index=True, frame=1)
+    assert np.array_equal(cube.texture[:, 3, :], -data[:, 3, :])
+
+
+def test_cache_dir(tmp_path: Path) -> None:
+    data = np.random.default_rng(0).random((20, 30, 40)).astype(np.float32)
+    path = str(tmp_path / "image.nii.gz")
+    _write_nifti(path, data)
+    cache_dir = tmp_path / "cache"
+
+    for _ in range(2):
+        cube = get_nifti_cube(path, cache=False, cache_dir=str(cache_dir))
+        assert cube.is_lazy
+        assert np.array_equal(cube.image, data)
+    assert len(list(cache_dir.iterdir())) == 1
+
+
+def test_4d_frames(tmp_path: Path) -> None:
+    data = np.random.default_rng(0).random((4, 5, 6, 3)).astype(np.float32)
+    for name in ("image.nii", "image.nii.gz"):
+        path = str(tmp_path / name)
+        _write_nifti(path, data)
+
+        with pytest.raises(ValueError):
+            get_nifti_cube(path, cache=False)
+        cube = get_nifti_cube(path, cache=False, frame=2)
+        assert np.array_equal(cube.image, data[..., 2])
+
+        frames = list(iter_nifti_frames(path))
+        assert len(frames) == 3
+        for i, frame in enumerate(frames):
+            assert np.array_equal(frame.image, data[..., i])
+
+
+def test_crop(tmp_path: Path) -> None:
+    dat = np.zeros((20, 20, 20), dtype=np.int16)
+    dat[5:8, 6:9, 7:10] = 1
+    file_name = str(tmp_path / "mask.nii")
+    _write_nifti(file_name, dat)
+
+    cube = get_nifti_cube(file_name, crop=True, cache=False)
+    assert cube.shape == (5, 5, 5)
+    assert np.allclose(cube.transform([1, 1, 1, 1]), [10, 12, 14, 1])
+    assert get_nifti_cube(file_name, sparse=True, cache=False).is_lazy
+
+
+def _shared_sum(handle: SharedDatacube) -> Tuple[float, bool, int]:
+    cube = get_nifti_cube(handle)
+    assert isinstance(cube, Datacube)
+    lazy = cube.is_lazy
+    total = float(cube.image.sum())
+    del cube
+    gc.collect()
+    # shared memory blocks are released with the worker's cube
+    return total, lazy, len(shared._attached)
+
+
+def test_shared(tmp_path: Path) -> None:
+    dat = np.random.default_rng(0).random((5, 6, 7, 2)).astype(np.float32)
+    file_name = str(tmp_path / "a.nii")
+    _write_nifti(file_name, dat)
+
+    mapped = get_nifti_cube(file_name, frame=1, cache=False)
+    handle = mapped.to_shared()
+    assert handle.kind == "proxy" and handle.array.file_name is not None
+    assert mapped.to_shared() is handle
+
+    doubled = mapped * 2
+    in_memory = doubled.to_shared()
+    assert in_memory.array.shm_name is not None
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        (file_sum, file_lazy, _), (shm_sum, shm_lazy, attached) = executor.map(
+            _shared_sum, [handle, in_memory]
+        )
+    assert np.isclose(file_sum, dat[..., 1].sum())
+    assert file_lazy
+    assert np.isclose(shm_sum, 2 * dat[..., 1].sum())
+    assert not shm_lazy
+    assert attached == 0
+    in_memory.close()
+    assert in_memory.closed
+
+    # closed handles are not reused
+    shared_again = doubled.to_shared()
+    assert shared_again is not in_memory and not shared_again.closed
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        shm_sum, _, _ = executor.submit(_shared_sum, shared_again).result()
+    assert np.isclose(shm_sum, 2 * dat[..., 1].sum())
+    shared_again.close()
+
+
+@pytest.mark.parametrize("option", ["memmap", "gzip_index", "cache_dir"])
+def test_reorient(tmp_path: Path, option: str) -> None:
+    dat = np.arange(4 * 5 * 6, dtype=np.int16).reshape((4, 5, 6))
+    aff = np.array(
+        [
+            [0.0, -2.0, 0.0, 10.0],
+            [0.0, 0.0, 2.0, 0.0],
+            [2.0, 0.0, 0.0, 0.0],
+            [0.0, 0.0, 0.0, 1.0],
+        ]
+    )
+    kwargs: Dict[str, Any] = {}
+    file_name = str(tmp_path / "a.nii")
+    if option == "gzip_index":
+        pytest.importorskip("indexed_gzip")
+        file_name += ".gz"
+        kwargs["gzip_index"] = True
+    elif option == "cache_dir":
+        kwargs["cache_dir"] = str(tmp_path / "cache")
+    nib.save(nib.Nifti1Image(dat, aff), file_name)
+
+    cube = get_nifti_cube(file_name, cache=False, **kwargs)
+    canonical = get_nifti_cube(file_name, reorient=True, cache=False, **kwargs)
+    assert canonical.is_lazy
+    assert canonical.shape == (5, 6, 4)
+    assert np.allclose(canonical.affine[:3, :3], np.diag([2.0, 2.0, 2.0]))
+    for voxel in ([1, 2, 3, 1], [4, 0, 2, 1]):
+        world = canonical.transform(voxel)
+        original = np.round(cube.transform_inv(world)).astype(int)
+        assert canonical.texture[tuple(voxel[:3])] == dat[tuple(original[:3])]
+
+    expected = nib.orientations.apply_orientation(
+        dat, nib.orientations.io_orientation(aff)
+    )
+    assert np.array_equal(canonical.texture[:, 2, 1:4], expected[:, 2, 1:4])
+    assert np.array_equal(canonical.texture[::-2, -1], expected[::-2, -1])
+    assert canonical.is_lazy
+    assert np.array_equal(canonical.image, expected)
+    assert canonical.reorient() is canonical
@@ -0,0 +1,215 @@
+from typing import Any
+
+import fineslice as fine
+import numpy as np
+import pytest
+
+from mrirage import (
+    Datacube,
+    SliceCache,
+    project_volume,
+    project_volumes,
+    sample_slice,
+    sample_slice_aligned,
+    slice_grid,
+)
+from mrirage.slicer import projection as projection_module
+from mrirage.slicer.interpolate import interpolate
+
+
+@pytest.mark.parametrize("view_axis", [0, 1, 2])
+def test_sample_slice_aligned(view_axis: int) -> None:
+    dat = np.random.default_rng(0).random((12, 10, 8))
+    # voxel axes (z, x, y) with flipped x
+    aff = np.array(
+        [
+            [0.0, -2.0, 0.0, 30.0],
+            [0.0, 0.0, 1.5, -4.0],
+            [1.0, 0.0, 0.0, 2.0],
+            [0.0, 0.0, 0.0, 1.0],
+        ]
+    )
+    cube = Datacube(dat, aff)
+    origin = cube.transform([5, 4, 3, 1])
+
+    sample = sample_slice_aligned(cube, view_axis, origin)
+    expected = fine.sample_2d(
+        texture=dat, affine=aff, out_position=origin, out_axis=view_axis
+    )
+    assert sample is not None and expected is not None
+    assert np.array_equal(sample.texture, expected.texture)
+    assert np.allclose(sample.coordinates, expected.coordinates)
+    assert np.shares_memory(sample.texture, dat)
+
+    # bounded slices match fineslice's grid
+    rng = np.random.default_rng(1)
+    world_bounds = cube.affine_info.world_bounds
+    for _ in range(20):
+        bounds = world_bounds.copy()
+        size = world_bounds[:3, 1] - world_bounds[:3, 0]
+        bounds[:3, 0] += rng.random(3) * size / 3
+        bounds[:3, 1] -= rng.random(3) * size / 3
+        sample = sample_slice(cube, view_axis, origin, bounds, cache=None)
+        expected = fine.sample_2d(
+            texture=dat,
+            affine=aff,
+            out_position=origin,
+            out_axis=view_axis,
+            out_bounds=bounds,
+        )
+        assert sample is not None and expected is not None
+        assert sample.texture.shape == expected.texture.shape
+        assert np.array_equal(sample.texture, expected.texture)
+        assert np.allclose(sample.coordinates, expected.coordinates)
+
+    outside = origin.copy()
+    outside[view_axis] += 100
+    assert sample_slice_aligned(cube, view_axis, outside) is None
+
+
+def test_slice_cache() -> None:
+    dat = np.random.default_rng(0).random((12, 10, 8))
+    cube = Datacube(dat, np.eye(4))
+    cache = SliceCache()
+
+    origin = fine.types.sampler_point_3d((4, 5, 6))
+    first = sample_slice(cube, 2, origin, cache=cache)
+    # only the offset along the view axis selects the slice
+    again = sample_slice(cube, 2, fine.types.sampler_point_3d((1, 2, 6)), cache=cache)
+    assert first is not None
+    assert id(again) == id(first)
+    assert not first.texture.flags.writeable
+    # cached slices do not keep the volume alive
+    assert not np.shares_memory(first.texture, dat)
+    assert cache.stats.hits == 1 and cache.stats.misses == 1
+
+    resampled = sample_slice(cube, 2, origin, out_resolution=(20, 24), cache=cache)
+    assert resampled is not None and resampled.texture.shape == (24, 20)
+    assert sample_slice(cube, 2, origin + [0, 0, 50, 0], cache=cache) is None
+    assert cache.stats.entries == 3
+
+    cube.apply_gaussian(1.0)
+    changed = sample_slice(cube, 2, origin, cache=cache)
+    assert changed is not None and not np.array_equal(changed.texture, first.texture)
+
+    cache.max_bytes = 0
+    sample_slice(cube, 1, origin, cache=cache)
+    assert cache.stats.entries == 1 and cache.stats.evictions == 4
+    cache.max_bytes = 1 << 20
+
+    # deferred cubes follow in-place changes of their operands
+    for mask in (cube > 0.5, cube * 2):
+        before = sample_slice(mask, 2, origin, cache=cache)
+        max_before = mask.stats.max
+        cube.normalize(max_value=0.5, out=cube.image)
+        after = sample_slice(mask, 2, origin, cache=cache)
+        assert before is not None and after is not None
+        assert np.array_equal(after.texture, mask.image[:, :, 6])
+        assert not np.array_equal(after.texture, before.texture)
+        assert mask.stats.max != max_before
+        cube.normalize(out=cube.image)
+    cache.clear()
+    assert cache.stats.entries == 0
+
+
+@pytest.mark.parametrize("view_axis", [0, 1, 2])
+def test_slice_grid(view_axis: int) -> None:
+    rng = np.random.default_rng(0)
+    dat = rng.random((12, 10, 8))
+    aff = np.diag([2.0, 1.5, 1.0, 1.0])
+    aff[:3, :3] = np.dot(aff[:3, :3], [[1, 0.2, 0], [-0.2, 1, 0.1], [0, -0.1, 1]])
+    aff[:3, 3] = (-5, 3, 2)
+    cube = Datacube(dat, aff)
+    origin = cube.transform([6, 5, 4, 1])
+    bounds = np.array([[-10, 20], [-5, 15], [-2, 10], [1, 1]], dtype=float)
+
+    for b, res in ((None, None), (bounds, None), (bounds, (30, 20))):
+        sample = sample_slice(cube, view_axis, origin, b, res, cache=None)
+        expected = fine.sample_2d(
+            texture=dat,
+            affine=aff,
+            out_position=origin,
+            out_axis=view_axis,
+            out_bounds=b,
+            out_resolution=res,  # type: ignore
+        )
+        assert sample is not None and expected is not None
+        assert np.array_equal(sample.texture, expected.texture)
+        assert np.allclose(sample.coordinates, expected.coordinates)
+
+    # cubes on the same voxel grid share the sampling grid
+    grid = slice_grid(aff, dat.shape, view_axis, origin, bounds)
+    assert grid is not None
+    assert slice_grid(aff, dat.shape, view_axis, origin, bounds) is grid
+    alpha = Datacube(rng.random(dat.shape), aff.copy())
+    sample_alpha = sample_slice(alpha, view_axis, origin, bounds, cache=None)
+    assert sample_alpha is not None
+    assert np.array_equal(sample_alpha.texture, grid.gather(alpha.image))
+
+
+def test_project_volume(monkeypatch: pytest.MonkeyPatch) -> None:
+    dat = np.random.default_rng(0).random((12, 10, 8))
+    cube = Datacube(dat, np.diag([2.0, 1.0, 1.5, 1.0]))
+    expected = fine.sample_3d(texture=dat, affine=cube.affine)
+    assert expected is not None
+    cache = SliceCache()
+
+    for axis in range(3):
+        projection = project_volume(cube, axis, cache=cache)
+        assert projection is not None
+        assert np.allclose(projection.texture, np.nansum(expected.texture, axis=axis))
+        assert np.allclose(
+            projection.coordinates, np.delete(expected.coordinates, axis, axis=0)
+        )
+    # the volume is resampled once for all three axes
+    assert cache.stats.misses == 1 and cache.stats.hits == 2
+
+    mask = project_volume(
+        cube, 1, reduction="max", function=lambda image: image > 0.5, cache=cache
+    )
+    assert mask is not None
+    assert np.array_equal(mask.texture, np.max(expected.texture > 0.5, axis=1))
+
+    # projections of the same cube share one resampling
+    resamples = []
+    resample = fine.sample_3d
+
+    def sample_3d(**kwargs: Any) -> Any:
+        resamples.append(kwargs)
+        return resample(**kwargs)
+
+    monkeypatch.setattr(projection_module.fine, "sample_3d", sample_3d)
+    total, peak = project_volumes(
+        cube, 0, [("sum", None), ("max", lambda image: image * 2)], cache=cache
+    )
+    assert len(resamples) == 1  # the sum was cached above
+    assert total is not None and peak is not None
+    assert np.allclose(peak.texture, np.nanmax(expected.texture * 2, axis=0))
+    cube.invalidate()
+    total, peak = project_volumes(
+        cube, 2, [("sum", None), ("max", lambda image: image > 0.2)], cache=cache
+    )
+    assert len(resamples) == 2
+    assert total is not None and peak is not None
+    assert np.allclose(total.texture, np.nansum(expected.texture, axis=2))
+
+
+@pytest.mark.parametrize("method", ["linear", "cubic"])
+def test_interpolate(method: str) -> None:
+    i, j, k = np.meshgrid(np.arange(10), np.arange(12), np.arange(14), indexing="ij")
+    dat = 2.0 * i - 0.5 * j + 0.25 * k
+    rng = np.random.default_rng(0)
+    # interior points (away from the repeated edges) on more than one task
+    voxels = rng.uniform(1, 8, size=(3, 150, 7))
+    expected = 2.0 * voxels[0] - 0.5 * voxels[1] + 0.25 * voxels[2]
+
+    out = interpolate(dat, voxels, method)
+    assert out.dtype == np.float32 and out.shape == (150, 7)
+    assert np.allclose(out, expected, atol=1e-4)
+    assert np.array_equal(out, interpolate(dat, voxels, method, max_workers=1))
+    assert np.allclose(
+        interpolate(dat, np.full((3, 1, 1), 20.0), method), dat[-1, -1, -1]
+    )
+
+    with pytest.raises(ValueError):
+        interpolate(dat, voxels, "quintic")